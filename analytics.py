@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+from idle_reasons import UNCODED
+from storage import SHEET_HEADERS, column_name
+
+# Crane Data headers -> DataFrame column names
+CRANE_COLUMNS = {
+    'Date': 'date',
+    'Shift': 'shift',
+    'Crane Number': 'crane_number',
+    'Operator': 'operator',
+    'Start Time': 'start_time',
+    'Stop Time': 'stop_time',
+    'Active Duration': 'active',
+    'Idle Reason': 'idle_reason',
+    'Active Seconds': 'active_seconds',
+    'Idle Code': 'idle_code'
+}
+
+def time_of_day(values):
+    # 'HH:MM:SS' strings are fixed width, so parse the digits as a byte
+    # matrix instead of going through the generic string parser
+    values = pd.Series(values)
+    missing = values.isna().to_numpy()
+    if missing.any():
+        values = values.fillna('00:00:00')
+    digits = np.asarray(values, dtype='S8').view(np.uint8).reshape(-1, 8).astype(np.int64) - ord('0')
+    seconds = (
+        (digits[:, 0] * 10 + digits[:, 1]) * 3600 +
+        (digits[:, 3] * 10 + digits[:, 4]) * 60 +
+        digits[:, 6] * 10 + digits[:, 7]
+    )
+    seconds = pd.to_timedelta(seconds, unit='s')
+    return seconds.where(~missing, pd.NaT) if missing.any() else seconds
+
+def seconds_column(seconds, durations):
+    # Numeric seconds where stored; the display string is only parsed for
+    # rows written before the seconds column existed
+    seconds = pd.to_numeric(seconds).astype('float64')
+    legacy = seconds.isna()
+    if legacy.any():
+        seconds.loc[legacy] = pd.to_timedelta(durations[legacy]).dt.total_seconds()
+    return seconds, legacy
+
+def padded(rows, width):
+    # Rows written before a column was added (closed partitions and
+    # archives are never upgraded) end early; their missing cells are empty
+    for row in rows:
+        yield row if len(row) >= width else list(row) + [None] * (width - len(row))
+
+def crane_frame_from_rows(rows):
+    # Build a typed frame from raw Crane Data rows with vectorized parsing
+    headers = SHEET_HEADERS['Crane Data']
+    frame = pd.DataFrame.from_records(
+        padded(rows, len(headers)), columns=[CRANE_COLUMNS[header] for header in headers]
+    )
+    frame['date'] = pd.to_datetime(frame['date'])
+    frame['crane_number'] = frame['crane_number'].astype('int64')
+    frame['idle_code'] = pd.to_numeric(frame['idle_code'])
+    seconds, legacy = seconds_column(frame['active_seconds'], frame['active'])
+    frame['active'] = pd.to_timedelta(seconds, unit='s')
+
+    # Rows with seconds are one shift/day segment dated by its start; older
+    # rows are dated when the crane stopped, so they are placed back from
+    # the stop time and may begin on the previous day
+    start = frame['date'] + time_of_day(frame['start_time'])
+    stop = frame['date'] + time_of_day(frame['stop_time'])
+    frame['start'] = start.where(~legacy, stop - frame['active'])
+    frame['stop'] = (start + frame['active']).where(~legacy, stop)
+
+    for column in ['shift', 'operator', 'idle_reason']:
+        frame[column] = frame[column].astype('category')
+
+    return frame.drop(columns=['start_time', 'stop_time', 'active_seconds'])
+
+DATE_HEADERS = {'Date', 'Start Date'}
+TIME_HEADERS = {'Start Time', 'Stop Time', 'Finished Time'}
+NUMERIC_HEADERS = {'Crane Number', 'Tons Loaded', 'Quantity', 'Number of Hatches', 'Idle Code'}
+
+def sheet_frame_from_rows(sheet_name, rows):
+    # Generic typed frame for any sheet, columns named like the SQLite store
+    headers = SHEET_HEADERS[sheet_name]
+    frame = pd.DataFrame.from_records(
+        padded(rows, len(headers)), columns=[column_name(header) for header in headers]
+    )
+    for header in headers:
+        column = column_name(header)
+        if header in DATE_HEADERS:
+            frame[column] = pd.to_datetime(frame[column])
+        elif header in TIME_HEADERS:
+            frame[column] = time_of_day(frame[column]).to_numpy()
+        elif header in NUMERIC_HEADERS:
+            frame[column] = pd.to_numeric(frame[column])
+    if 'active_seconds' in frame:
+        seconds, _ = seconds_column(frame.pop('active_seconds'), frame['active_duration'])
+        frame['active_duration'] = pd.to_timedelta(seconds, unit='s')
+    return frame
+
+def load_crane_frame(excel_handler, start_date=None, end_date=None):
+    rows = excel_handler.store.iter_rows('Crane Data', start_date, end_date)
+    return crane_frame_from_rows(rows)
+
+def to_hours(durations):
+    return durations.dt.total_seconds() / 3600
+
+def with_idle(frame):
+    # Idle time is the gap between a stop and the same crane's next start,
+    # booked to the idle reason given at that stop
+    frame = frame.sort_values(['crane_number', 'start'])
+    next_start = frame.groupby('crane_number', observed=True)['start'].shift(-1)
+    idle = (next_start - frame['stop']).clip(lower=pd.Timedelta(0))
+    return frame.assign(idle=idle.fillna(pd.Timedelta(0)))
+
+def active_hours(frame, by='crane_number'):
+    return to_hours(frame.groupby(by, observed=True)['active'].sum())
+
+def idle_hours_by_reason(frame):
+    frame = with_idle(frame)
+    return to_hours(frame.groupby('idle_reason', observed=True)['idle'].sum()).sort_values(ascending=False)
+
+def shift_totals(frame):
+    frame = with_idle(frame)
+    totals = frame.groupby(['date', 'shift'], observed=True)[['active', 'idle']].sum()
+    return totals.apply(to_hours)
+
+def operator_totals(frame):
+    frame = with_idle(frame)
+    totals = frame.groupby('operator', observed=True).agg(
+        active=('active', 'sum'), idle=('idle', 'sum'), runs=('active', 'size')
+    )
+    totals[['active', 'idle']] = totals[['active', 'idle']].apply(to_hours)
+    return totals
+
+def idle_code_column(frame, registry):
+    # Stored codes where present. Rows written before codes existed are
+    # coded from their label, looking up each distinct label once through
+    # the category codes rather than once per row
+    if 'idle_code' in frame:
+        codes = pd.to_numeric(frame['idle_code']).astype('float64')
+    else:
+        codes = pd.Series(np.nan, index=frame.index)
+    missing = codes.isna().to_numpy()
+    if missing.any():
+        reasons = frame['idle_reason'].astype('category')
+        # Category code -1 (no reason) picks the trailing UNCODED
+        label_codes = np.array(
+            [registry.code_for(label) for label in reasons.cat.categories] + [UNCODED], dtype='float64'
+        )
+        codes[missing] = label_codes[reasons.cat.codes.to_numpy()[missing]]
+    return codes.fillna(UNCODED).astype('int64')
+
+def downtime_pareto(frame, registry, level=None):
+    # Idle hours per reason code, largest first, with each line's share and
+    # the running share. With level, codes roll up to their category cut
+    # to that many levels ('Equipment' for level 1). Rows are summed with a
+    # bincount over the integer codes; labels are only attached per code
+    frame = with_idle(frame)
+    codes = idle_code_column(frame, registry).to_numpy()
+    hours = np.bincount(codes, weights=frame['idle'].dt.total_seconds().to_numpy()) / 3600
+    used = np.flatnonzero(hours)
+    table = pd.DataFrame({
+        'code': used,
+        'label': [registry.label_for(code) for code in used],
+        'category': [registry.category_for(code, level) for code in used],
+        'hours': hours[used]
+    })
+    if level is not None:
+        table = table.groupby('category', as_index=False)['hours'].sum()
+    table = table.sort_values('hours', ascending=False, ignore_index=True)
+    total = table['hours'].sum()
+    table['share'] = table['hours'] / total if total else 0.0
+    table['cumulative_share'] = table['share'].cumsum()
+    return table
+
+def downtime_trend(frame, registry, freq='W', level=1):
+    # Idle hours per period (by stop time), one column per category, or per
+    # reason label with level None
+    frame = with_idle(frame)
+    codes = idle_code_column(frame, registry)
+    names = {
+        code: registry.category_for(code, level) if level else registry.label_for(code)
+        for code in codes.unique()
+    }
+    trend = to_hours(frame['idle']).groupby(
+        [frame['stop'].dt.to_period(freq), codes.map(names).rename('category' if level else 'reason')], 
+        observed=True
+    ).sum().unstack(fill_value=0)
+    return trend.loc[:, trend.sum() > 0]
+
+def daily_utilisation(frame, freq='D'):
+    # Active hours per crane per period, one column per crane
+    active = frame.set_index('start').groupby('crane_number')['active'].resample(freq).sum()
+    return to_hours(active).unstack('crane_number', fill_value=0)
+
+def crane_overlap(frame, min_cranes=2):
+    # Sweep start/stop events: +1 at each start, -1 at each stop. The time
+    # between consecutive events where the running count is at least
+    # min_cranes is time with that many cranes working at once
+    events = pd.concat([
+        pd.DataFrame({'at': frame['start'], 'delta': 1}),
+        pd.DataFrame({'at': frame['stop'], 'delta': -1})
+    ], ignore_index=True).sort_values(['at', 'delta'], kind='stable', ignore_index=True)
+    running = events['delta'].cumsum()
+    span = events['at'].shift(-1) - events['at']
+    overlapping = span[running >= min_cranes]
+    by_day = overlapping.groupby(events.loc[overlapping.index, 'at'].dt.normalize()).sum()
+    return to_hours(by_day)
+
+__all__ = [
+    'crane_frame_from_rows', 'sheet_frame_from_rows', 'load_crane_frame', 'active_hours', 
+    'idle_hours_by_reason', 'shift_totals', 'operator_totals', 
+    'daily_utilisation', 'crane_overlap', 'idle_code_column', 'downtime_pareto', 'downtime_trend'
+]
\ No newline at end of file
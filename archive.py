@@ -0,0 +1,227 @@
+from datetime import date, datetime, time, timedelta
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from analytics import crane_frame_from_rows, sheet_frame_from_rows
+from storage import SHEET_HEADERS, table_name
+
+# Files are partitioned by month; within a file rows are sorted by date
+# and shift so row-group statistics let date filters skip the rest.
+# Day or shift directories would mean hundreds of tiny files whose
+# discovery alone costs more than the scan
+PARTITION_COLUMN = 'month'
+ROWS_PER_GROUP = 8192
+# A day is only closed this long after it ends, so rows still queued in a
+# writer when the day ended have reached the store
+SETTLE_TIME = timedelta(hours=1)
+
+# Column types of the archived tables. Inferred types would follow the
+# first batch written: a column that was empty that day would be stored as
+# null, and values in later files lost or unreadable
+TIMESTAMP = pa.timestamp('ns')
+DURATION = pa.duration('ns')
+ARCHIVE_SCHEMAS = {
+    sheet_name: pa.schema(fields + [(PARTITION_COLUMN, pa.string())])
+    for sheet_name, fields in {
+        'Crane Data': [
+            ('date', TIMESTAMP), ('shift', pa.string()), ('crane_number', pa.int64()), 
+            ('operator', pa.string()), ('active', DURATION), ('idle_reason', pa.string()), 
+            ('idle_code', pa.float64()), ('start', TIMESTAMP), ('stop', TIMESTAMP)
+        ],
+        'Barge Data': [
+            ('date', TIMESTAMP), ('barge_name_id', pa.string()), ('start_time', DURATION), 
+            ('stop_time', DURATION), ('tons_loaded', pa.float64()), ('cranes', pa.string()), 
+            ('start_date', TIMESTAMP)
+        ],
+        'Generator Data': [
+            ('date', TIMESTAMP), ('generator_id', pa.string()), ('start_time', DURATION), 
+            ('stop_time', DURATION), ('active_duration', DURATION)
+        ],
+        'Ship Data': [
+            ('date', TIMESTAMP), ('ship_name', pa.string()), ('start_time', DURATION), 
+            ('finished_time', DURATION), ('quantity', pa.float64()), 
+            ('number_of_hatches', pa.float64()), ('cranes', pa.string()), ('start_date', TIMESTAMP)
+        ]
+    }.items()
+}
+
+def archive_table(sheet_name, frame):
+    # Text columns may hold numbers (a generator id from a backfill) and
+    # numeric ones ints or NaN; both are made to fit the sheet's schema
+    schema = ARCHIVE_SCHEMAS[sheet_name]
+    for field in schema:
+        column = frame[field.name]
+        if pa.types.is_string(field.type):
+            frame[field.name] = column.astype(object).where(column.notna(), None).map(
+                lambda value: None if value is None else str(value)
+            )
+        elif pa.types.is_floating(field.type):
+            frame[field.name] = pd.to_numeric(column).astype('float64')
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+def typed_frame(sheet_name, rows):
+    if sheet_name == 'Crane Data':
+        return crane_frame_from_rows(rows)
+    return sheet_frame_from_rows(sheet_name, rows)
+
+class ShiftArchive:
+    # Closed days are copied out of the live store into hive-partitioned
+    # Parquet files; the manifest records how far each sheet is archived.
+    # The live store keeps its rows (exports, history and backfills still
+    # read them), so reading the tail is only cheap on stores that can seek
+    # to a date: SQLite by its date index, the partitioned backend by its
+    # manifest. A single xlsx workbook is parsed in full for any range that
+    # reaches past the watermark
+    def __init__(self, directory='archive'):
+        self.directory = directory
+        self.manifest_filename = os.path.join(directory, 'manifest.json')
+        self.manifest = self.read_manifest()
+
+    def read_manifest(self):
+        if not os.path.exists(self.manifest_filename):
+            return {}
+        with open(self.manifest_filename, encoding='utf-8') as manifest:
+            return json.load(manifest)
+
+    def write_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_filename = self.manifest_filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as manifest:
+            json.dump(self.manifest, manifest, indent=2)
+        os.replace(temp_filename, self.manifest_filename)
+
+    def archived_through(self, sheet_name):
+        archived = self.manifest.get(sheet_name)
+        return date.fromisoformat(archived) if archived else None
+
+    def partitioning(self):
+        return ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+
+    def compact(self, excel_handler, today=None, open_since=None):
+        # Archive every day before today that is not archived yet. Only the
+        # rows after the previous watermark are read from the live store.
+        # open_since is the day the earliest run still in progress started:
+        # its rows are dated by the days it covers but only written when it
+        # stops, so that day and every later one stay open
+        today = today or (datetime.now() - SETTLE_TIME).date()
+        until = today - timedelta(days=1)
+        if open_since is not None:
+            until = min(until, open_since - timedelta(days=1))
+        archived_rows = {}
+
+        for sheet_name in SHEET_HEADERS:
+            archived = self.archived_through(sheet_name)
+            since = archived + timedelta(days=1) if archived else None
+            if since is not None and since > until:
+                continue
+
+            rows = list(excel_handler.store.iter_rows(sheet_name, since, until))
+            archived_rows[sheet_name] = len(rows)
+            if rows:
+                frame = typed_frame(sheet_name, rows)
+                sort_columns = ['date', 'shift'] if 'shift' in frame else ['date']
+                frame = frame.sort_values(sort_columns, kind='stable')
+                frame[PARTITION_COLUMN] = frame['date'].dt.strftime('%Y-%m')
+                ds.write_dataset(
+                    archive_table(sheet_name, frame),
+                    os.path.join(self.directory, table_name(sheet_name)),
+                    format='parquet',
+                    schema=ARCHIVE_SCHEMAS[sheet_name],
+                    partitioning=self.partitioning(),
+                    basename_template=f'{until.isoformat()}-{{i}}.parquet',
+                    existing_data_behavior='overwrite_or_ignore',
+                    max_rows_per_group=ROWS_PER_GROUP,
+                    min_rows_per_group=ROWS_PER_GROUP
+                )
+
+            self.manifest[sheet_name] = until.isoformat()
+            self.write_manifest()
+
+        return archived_rows
+
+    def reopen(self, sheet_name, day):
+        # Rows dated `day` reached the live store after it was archived
+        # (e.g. a backfill). Its month and every later one are dropped and
+        # the watermark moved back, so the next compact rebuilds them from
+        # the live store, which keeps every row. Returns whether anything
+        # was reopened
+        archived = self.archived_through(sheet_name)
+        if archived is None or day > archived:
+            return False
+
+        month = day.strftime('%Y-%m')
+        path = os.path.join(self.directory, table_name(sheet_name))
+        entries = os.listdir(path) if os.path.exists(path) else []
+        dropped = [entry for entry in entries if entry.split('=', 1)[-1] >= month]
+        if len(dropped) == len(entries):
+            self.manifest.pop(sheet_name, None)
+        else:
+            self.manifest[sheet_name] = (day.replace(day=1) - timedelta(days=1)).isoformat()
+        # The watermark moves first: until the files are gone, load_sheet
+        # reads those days from the live store and never from both
+        self.write_manifest()
+        for entry in dropped:
+            shutil.rmtree(os.path.join(path, entry))
+        return True
+
+    def load(self, sheet_name, start_date=None, end_date=None, columns=None):
+        # The month filter prunes partition directories, the date filter is
+        # pushed down to row-group statistics inside the remaining files
+        path = os.path.join(self.directory, table_name(sheet_name))
+        if not os.path.exists(path):
+            return None
+
+        dataset = ds.dataset(
+            path, schema=ARCHIVE_SCHEMAS[sheet_name], format='parquet', partitioning=self.partitioning()
+        )
+        conditions = []
+        if start_date is not None:
+            conditions.append(ds.field(PARTITION_COLUMN) >= start_date.strftime('%Y-%m'))
+            conditions.append(ds.field('date') >= datetime.combine(start_date, time()))
+        if end_date is not None:
+            conditions.append(ds.field(PARTITION_COLUMN) <= end_date.strftime('%Y-%m'))
+            conditions.append(ds.field('date') <= datetime.combine(end_date, time()))
+        condition = None
+        for part in conditions:
+            condition = part if condition is None else condition & part
+
+        frame = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        return frame.drop(columns=[PARTITION_COLUMN], errors='ignore')
+
+    def load_sheet(self, excel_handler, sheet_name, start_date=None, end_date=None):
+        # Archived days come from Parquet; only the unarchived tail is
+        # asked of the live store (see the class comment for xlsx)
+        archived = self.archived_through(sheet_name)
+        frames = []
+        if archived is not None and (start_date is None or start_date <= archived):
+            end = min(end_date, archived) if end_date else archived
+            frame = self.load(sheet_name, start_date, end)
+            if frame is not None:
+                frames.append(frame)
+
+        if archived is None or end_date is None or end_date > archived:
+            since = archived + timedelta(days=1) if archived else None
+            if start_date is not None and (since is None or start_date > since):
+                since = start_date
+            rows = list(excel_handler.store.iter_rows(sheet_name, since, end_date))
+            if rows or not frames:
+                frames.append(typed_frame(sheet_name, rows))
+
+        if not frames:
+            # Archived through the range, but the sheet never had rows
+            frames.append(typed_frame(sheet_name, []))
+        frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        for column in ('shift', 'operator', 'idle_reason'):
+            if column in frame:
+                frame[column] = frame[column].astype('category')
+        return frame
+
+    def load_crane_frame(self, excel_handler, start_date=None, end_date=None):
+        return self.load_sheet(excel_handler, 'Crane Data', start_date, end_date)
+
+__all__ = ['ShiftArchive']
\ No newline at end of file
@@ -0,0 +1,345 @@
+from datetime import datetime, timedelta
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from excel_handler import ExcelHandler, SHEET_HEADERS
+
+# Row counts of the synthetic stores the log_* calls run against
+DEFAULT_SIZES = [1000, 100000, 1000000]
+# Synthetic history is spread over days, this many crane runs per day
+ROWS_PER_DAY = 200
+# A case whose process neither answers nor exits within this is abandoned
+CASE_TIMEOUT = 3600
+IDLE_REASONS = ['Waiting for Cargo', 'Operator Break', 'Maintenance', 'Weather Conditions', 'Shift Change']
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def summarize(name, samples, elapsed, operations=None, **params):
+    # samples are per-operation latencies in seconds
+    ordered = sorted(samples)
+    operations = operations or len(ordered)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'name': name,
+        'params': params,
+        'count': operations,
+        'throughput_per_s': operations / elapsed if elapsed else None,
+        'latency_ms': {
+            'mean': sum(ordered) / len(ordered) * 1000,
+            'p50': percentile(0.50),
+            'p90': percentile(0.90),
+            'p99': percentile(0.99),
+            'max': ordered[-1] * 1000
+        },
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def timed(samples, function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    samples.append(time.perf_counter() - started)
+    return result
+
+def synthetic_crane_rows(excel_handler, rows, today=None):
+    # Crane runs walking back from today, as a busy terminal would log them
+    today = today or datetime.now().date()
+    index = 0
+    while index < rows:
+        day = today - timedelta(days=index // ROWS_PER_DAY)
+        start_time = datetime.combine(day, datetime.min.time()) + timedelta(minutes=(index * 7) % 1380)
+        stop_time = start_time + timedelta(minutes=5 + index % 50)
+        for row in excel_handler.crane_rows(
+            1 + index % 2,
+            f'Operator {index % 12}',
+            start_time,
+            stop_time,
+            IDLE_REASONS[index % len(IDLE_REASONS)]
+        )[:rows - index]:
+            yield row
+            index += 1
+
+def build_synthetic_store(filename, backend, rows):
+    excel_handler = ExcelHandler(filename, backend=backend)
+    if backend != 'xlsx':
+        excel_handler.append_rows(
+            ('Crane Data', row) for row in synthetic_crane_rows(excel_handler, rows)
+        )
+        excel_handler.close()
+        return
+
+    # Appending through the store would load the workbook once per flush;
+    # a write-only workbook streams a million rows in one pass
+    import openpyxl
+
+    crane_rows = list(synthetic_crane_rows(excel_handler, rows))
+    excel_handler.close()
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_name, headers in SHEET_HEADERS.items():
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(headers)
+        if sheet_name == 'Crane Data':
+            for row in crane_rows:
+                sheet.append(row)
+    workbook.save(filename)
+
+def synthetic_filename(directory, backend):
+    return os.path.join(directory, f'synthetic.{"db" if backend == "sqlite" else "xlsx"}')
+
+def setup_log_calls(directory, backend, rows, **_):
+    build_synthetic_store(synthetic_filename(directory, backend), backend, rows)
+
+def bench_log_calls(directory, backend, rows, calls, flushes):
+    # log_* appends to the store journal; the flush is where the workbook
+    # is loaded and saved, so the two are reported separately. The store
+    # was built by setup_log_calls in a process of its own, so building
+    # it does not count towards this one's peak RSS
+    filename = synthetic_filename(directory, backend)
+
+    # A large batch size keeps flushes out of the log_* samples (SQLite
+    # commits every batch and has no such setting)
+    store_options = {'batch_size': calls * 4 + 1} if backend == 'xlsx' else {}
+    excel_handler = ExcelHandler(filename, backend=backend, **store_options)
+    now = datetime.now()
+    log_calls = {
+        'log_crane_data': lambda i: excel_handler.log_crane_data(
+            1, 'Operator 1', now - timedelta(minutes=i % 60 + 1), now, 'Break'),
+        'log_barge_data': lambda i: excel_handler.log_barge_data(
+            f'Barge {i}', now - timedelta(hours=2), now, 1500.0),
+        'log_generator_data': lambda i: excel_handler.log_generator_data(
+            'Generator 1', now - timedelta(hours=1), now),
+        'log_ship_data': lambda i: excel_handler.log_ship_data(
+            f'Ship {i}', now - timedelta(hours=6), now, 25000.0, 5)
+    }
+
+    results = []
+    flush_samples = []
+    flush_every = max(1, calls // flushes)
+    for name, log_call in log_calls.items():
+        samples = []
+        for i in range(calls):
+            timed(samples, log_call, i)
+            if (i + 1) % flush_every == 0:
+                timed(flush_samples, excel_handler.flush)
+        results.append(summarize(name, samples, sum(samples), backend=backend, rows=rows))
+
+    results.append(summarize('flush', flush_samples, sum(flush_samples), backend=backend, rows=rows))
+    excel_handler.close()
+    return results
+
+def bench_crane_cycles(directory, backend, cycles):
+    from data_manager import DataManager, Fleet, DEFAULT_FLEET
+
+    filename = os.path.join(directory, f'cycles.{"db" if backend == "sqlite" else "xlsx"}')
+    excel_handler = ExcelHandler(filename, backend=backend)
+    data_manager = DataManager(excel_handler, fleet=Fleet(DEFAULT_FLEET))
+
+    start_samples = []
+    stop_samples = []
+    started = time.perf_counter()
+    for i in range(cycles):
+        crane_number = 1 + i % 2
+        timed(start_samples, data_manager.start_crane, crane_number, f'Operator {crane_number}')
+        timed(stop_samples, data_manager.stop_crane, crane_number, 'Break')
+    elapsed = time.perf_counter() - started
+    excel_handler.close()
+
+    return [
+        summarize('start_crane', start_samples, elapsed, backend=backend),
+        summarize('stop_crane', stop_samples, elapsed, backend=backend)
+    ]
+
+def bench_current_shift(directory, calls, per_sample=100):
+    from data_manager import DataManager
+
+    # Single calls are close to the timer resolution, so each sample is
+    # the mean of per_sample back-to-back calls
+    data_manager = DataManager(ExcelHandler(':memory:', backend='sqlite'), load_history=False)
+    samples = []
+    started = time.perf_counter()
+    for _ in range(calls // per_sample):
+        sample_started = time.perf_counter()
+        for _ in range(per_sample):
+            data_manager.get_current_shift()
+        samples.append((time.perf_counter() - sample_started) / per_sample)
+    elapsed = time.perf_counter() - started
+    return [summarize('get_current_shift', samples, elapsed, operations=calls)]
+
+def bench_stop_both_cranes(directory, backend, rounds):
+    # Drives the real window offscreen: both cranes are started through
+    # their buttons, then the "Stop All Cranes" flow runs and the idle reason
+    # dialog is submitted; each sample runs until the rows are committed
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ['CRANELOGGER_BACKEND'] = backend
+    os.environ['CRANELOGGER_STORE'] = os.path.join(
+        directory, f'gui.{"db" if backend == "sqlite" else "xlsx"}'
+    )
+    os.chdir(directory)
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    from gui import CraneOperationSystem
+
+    app = QApplication([])
+    window = CraneOperationSystem()
+    window.excel_handler.start()
+
+    def submit_dialog():
+        dialog = QApplication.activeModalWidget()
+        if dialog is None:
+            QTimer.singleShot(0, submit_dialog)
+            return
+        dialog.accept()
+
+    crane_numbers = sorted(window.data_manager.fleet.cranes)[:2]
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        # Stopping a crane releases its operator, so each round assigns again
+        for crane_number in crane_numbers:
+            window.data_manager.assign_operator(crane_number, f'Operator {crane_number}')
+            window.crane_operator_labels[crane_number].setText(f'Operator {crane_number}')
+            window.crane_buttons[crane_number].click()
+        sample_started = time.perf_counter()
+        QTimer.singleShot(0, submit_dialog)
+        window.stop_all_cranes()
+        window.excel_handler.flush()
+        samples.append(time.perf_counter() - sample_started)
+    elapsed = time.perf_counter() - started
+
+    window.flush_storage()
+    window.close()
+    app.quit()
+    return [summarize('stop_both_cranes', samples, elapsed, backend=backend)]
+
+CASES = {
+    'log': bench_log_calls,
+    'cycles': bench_crane_cycles,
+    'shift': bench_current_shift,
+    'gui': bench_stop_both_cranes
+}
+
+# Data a case runs against, built before it in a separate process
+SETUPS = {
+    'log': setup_log_calls
+}
+
+def call_in_process(function, directory, kwargs, results):
+    results.put(function(directory, **kwargs))
+
+def run_in_process(function, directory, kwargs, timeout=CASE_TIMEOUT):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=call_in_process, args=(function, directory, kwargs, results))
+    process.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                pass
+            if process.exitcode is not None:
+                # A result put just before exiting is already in the pipe
+                try:
+                    return results.get(timeout=1)
+                except queue.Empty:
+                    raise RuntimeError(
+                        f'{function.__name__} exited with code {process.exitcode} without a result'
+                    ) from None
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'{function.__name__} did not finish in {timeout} s')
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+def run_case(case, **kwargs):
+    # Each case gets a fresh interpreter so peak RSS is its own, and its
+    # data set is built in another one first
+    with tempfile.TemporaryDirectory() as directory:
+        if case in SETUPS:
+            run_in_process(SETUPS[case], directory, kwargs)
+        return run_in_process(CASES[case], directory, kwargs)
+
+def source_version():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(cases=tuple(CASES), backend='xlsx', sizes=DEFAULT_SIZES, calls=200,
+                   flushes=4, cycles=500, shift_calls=100000, rounds=20, progress=None):
+    plan = []
+    if 'log' in cases:
+        plan += [('log', dict(backend=backend, rows=rows, calls=calls, flushes=flushes))
+                 for rows in sizes]
+    if 'cycles' in cases:
+        plan.append(('cycles', dict(backend=backend, cycles=cycles)))
+    if 'shift' in cases:
+        plan.append(('shift', dict(calls=shift_calls)))
+    if 'gui' in cases:
+        plan.append(('gui', dict(backend=backend, rounds=rounds)))
+
+    results = []
+    for case, kwargs in plan:
+        if progress:
+            progress(case, kwargs)
+        results.extend(run_case(case, **kwargs))
+
+    return {
+        'version': source_version(),
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+def result_key(result):
+    return (result['name'],) + tuple(sorted(result['params'].items()))
+
+def compare_results(baseline, current):
+    # Ratio of current to baseline p50 latency per matching benchmark
+    baseline_results = {result_key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = baseline_results.get(result_key(result))
+        if old:
+            rows.append((result, old['latency_ms']['p50'], result['latency_ms']['p50']))
+    return rows
+
+def describe(result):
+    params = ', '.join(f'{key}={value}' for key, value in sorted(result['params'].items()))
+    return f'{result["name"]}({params})' if params else result['name']
+
+def print_results(report, baseline=None, file=sys.stdout):
+    print(f'{"benchmark":<48} {"p50 ms":>9} {"p99 ms":>9} {"ops/s":>10} {"RSS MB":>8}', file=file)
+    for result in report['results']:
+        latency = result['latency_ms']
+        print(f'{describe(result):<48} {latency["p50"]:9.3f} {latency["p99"]:9.3f} '
+              f'{result["throughput_per_s"] or 0:10.0f} {result["peak_rss_mb"]:8.1f}', file=file)
+
+    if baseline:
+        print(f'\nCompared with {baseline.get("version") or "baseline"}:', file=file)
+        for result, old_p50, new_p50 in compare_results(baseline, report):
+            ratio = new_p50 / old_p50 if old_p50 else float('inf')
+            print(f'{describe(result):<48} {old_p50:9.3f} -> {new_p50:9.3f} ms  x{ratio:.2f}', file=file)
+
+__all__ = ['run_benchmarks', 'build_synthetic_store', 'compare_results', 'print_results']
\ No newline at end of file
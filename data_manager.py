@@ -1,68 +1,426 @@
-import pandas as pd
-from datetime import datetime, time, timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
+import json
+import os
+
+from excel_handler import active_seconds
+from idle_reasons import IdleReasonRegistry
+from job_tracker import JobTracker
+from metrics import timed
+from operator_roster import OperatorRoster
+from shift_calendar import ShiftCalendar
+
+class RunningTotals:
+    # Counters kept up to date on every event so live views never read the
+    # store; keys always start with (date, shift date, shift) so "today"
+    # and "this shift" queries touch at most a few entries. The shift date
+    # is the day the shift started (ShiftCalendar.shift_date), so the hours
+    # a night shift runs past midnight stay with that shift
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.crane_seconds = defaultdict(float)      # (date, shift date, shift, crane) -> seconds
+        self.operator_seconds = defaultdict(float)   # (date, shift date, shift, operator) -> seconds
+        self.idle_stops = defaultdict(int)           # (date, shift date, shift, idle reason) -> stops
+        self.barge_tons = defaultdict(float)         # (date, shift date, shift) -> tons
+        self.generator_seconds = defaultdict(float)  # (date, shift date, shift, generator) -> seconds
+        self.shifts_seen = defaultdict(set)          # date -> (shift date, shift) pairs with data
+
+    def merge(self, other):
+        for name in ('crane_seconds', 'operator_seconds', 'idle_stops', 
+                     'barge_tons', 'generator_seconds'):
+            counter = getattr(self, name)
+            for key, value in getattr(other, name).items():
+                counter[key] += value
+        for day, shifts in other.shifts_seen.items():
+            self.shifts_seen[day] |= shifts
+
+    def add_crane_run(self, day, shift, crane_number, operator, seconds, idle_reason, shift_day=None):
+        shift_key = (shift_day or day, shift)
+        self.crane_seconds[(day, *shift_key, crane_number)] += seconds
+        self.operator_seconds[(day, *shift_key, operator)] += seconds
+        # Only the part of a run that ended in a stop carries an idle reason
+        if idle_reason is not None:
+            self.idle_stops[(day, *shift_key, idle_reason)] += 1
+        self.shifts_seen[day].add(shift_key)
+
+    def add_barge(self, day, shift, tons_loaded, shift_day=None):
+        shift_key = (shift_day or day, shift)
+        self.barge_tons[(day, *shift_key)] += tons_loaded
+        self.shifts_seen[day].add(shift_key)
+
+    def add_generator_run(self, day, shift, generator_id, seconds, shift_day=None):
+        shift_key = (shift_day or day, shift)
+        self.generator_seconds[(day, *shift_key, generator_id)] += seconds
+        self.shifts_seen[day].add(shift_key)
+
+    def total(self, counter, day, shift=None, key=None):
+        # Without a shift, day is a calendar day. With one, day is the shift
+        # date, so total(..., *DataManager.shift_key(now)) is the shift in
+        # progress, including its part on the next calendar day
+        if shift:
+            parts = [(calendar_day, day, shift) for calendar_day in (day, day + timedelta(days=1))]
+        else:
+            parts = [(day, *shift_key) for shift_key in self.shifts_seen.get(day, ())]
+        if key is None:
+            return sum(counter.get(part, 0) for part in parts)
+        return sum(counter.get((*part, key), 0) for part in parts)
+
+    def crane_active(self, day, crane_number, shift=None):
+        return timedelta(seconds=self.total(self.crane_seconds, day, shift, crane_number))
+
+    def operator_active(self, day, operator, shift=None):
+        return timedelta(seconds=self.total(self.operator_seconds, day, shift, operator))
+
+    def idle_reason_stops(self, day, idle_reason, shift=None):
+        return self.total(self.idle_stops, day, shift, idle_reason)
+
+    def tons_loaded(self, day, shift=None):
+        return self.total(self.barge_tons, day, shift)
+
+    def generator_runtime(self, day, generator_id, shift=None):
+        return timedelta(seconds=self.total(self.generator_seconds, day, shift, generator_id))
+
+class EquipmentState:
+    # One per unit; slots keep hundreds of units cheap
+    __slots__ = ('kind', 'unit_id', 'name', 'running', 'start_time', 'operator')
+
+    def __init__(self, kind, unit_id, name):
+        self.kind = kind
+        self.unit_id = unit_id
+        self.name = name
+        self.running = False
+        self.start_time = None
+        self.operator = None
+
+# Used when no fleet file is present
+DEFAULT_FLEET = {
+    'cranes': [{'id': 1, 'name': 'Crane 1'}, {'id': 2, 'name': 'Crane 2'}],
+    'generators': [
+        {'id': 1, 'name': 'Generator 1'}, 
+        {'id': 2, 'name': 'Generator 2'}, 
+        {'id': 3, 'name': 'Generator 3'}
+    ]
+}
+
+class Fleet:
+    # Registry of equipment, keyed by id for O(1) lookup
+    def __init__(self, config):
+        self.cranes = {}
+        self.generators = {}
+        for kind, units in (('crane', self.cranes), ('generator', self.generators)):
+            for unit in config.get(kind + 's', []):
+                unit_id = unit['id']
+                units[unit_id] = EquipmentState(kind, unit_id, unit.get('name', f'{kind.title()} {unit_id}'))
+
+    @classmethod
+    def load(cls, filename='fleet.json'):
+        if not os.path.exists(filename):
+            return cls(DEFAULT_FLEET)
+        with open(filename, encoding='utf-8') as config:
+            return cls(json.load(config))
+
+    def crane(self, crane_number):
+        try:
+            return self.cranes[crane_number]
+        except KeyError:
+            raise ValueError("Invalid crane number") from None
+
+    def generator(self, generator_id):
+        try:
+            return self.generators[generator_id]
+        except KeyError:
+            raise ValueError("Invalid generator id") from None
+
+class RuntimeEngine:
+    # Start/stop bookkeeping for every kind of unit. All timestamps come
+    # from one clock, and running units are kept in their own index (in
+    # start order) so "what is running and for how long" only touches
+    # those units, however large the fleet
+    def __init__(self, clock=datetime.now):
+        self.clock = clock
+        self.running = {}   # (kind, unit id) -> EquipmentState
+
+    def now(self):
+        return self.clock()
+
+    def start(self, unit, at=None):
+        unit.running = True
+        unit.start_time = at or self.clock()
+        self.running[(unit.kind, unit.unit_id)] = unit
+        return unit.start_time
+
+    def stop(self, unit, at=None):
+        # Returns (start, stop), or None if the unit was not running
+        if not unit.running:
+            return None
+        start_time = unit.start_time
+        unit.running = False
+        unit.start_time = None
+        self.running.pop((unit.kind, unit.unit_id), None)
+        return start_time, at or self.clock()
+
+    def reindex(self, fleet):
+        # After state was restored directly onto the units
+        self.running = {
+            (unit.kind, unit.unit_id): unit
+            for group in (fleet.cranes, fleet.generators)
+            for unit in group.values() if unit.running
+        }
+
+    def elapsed(self, unit, now=None):
+        if not unit.running:
+            return timedelta()
+        return (now or self.clock()) - unit.start_time
+
+    def elapsed_since(self, unit, since, now=None):
+        # The part of the current run after `since`, e.g. midnight
+        if not unit.running:
+            return timedelta()
+        now = now or self.clock()
+        return max(timedelta(), now - max(unit.start_time, since))
+
+    def running_units(self, kind=None, now=None):
+        # (unit, elapsed) for every running unit, optionally of one kind
+        now = now or self.clock()
+        return [
+            (unit, now - unit.start_time)
+            for unit in self.running.values() if kind is None or unit.kind == kind
+        ]
 
 class DataManager:
-    def __init__(self, excel_handler):
+    def __init__(self, excel_handler, history_days=1, fleet=None, event_journal=None, 
+                 load_history=True, shift_calendar=None, roster=None, clock=None, 
+                 idle_reasons=None):
         self.excel_handler = excel_handler
+        self.event_journal = event_journal
         
-        # Crane tracking
-        self.crane_states = {
-            1: {
-                'running': False,
-                'start_time': None,
-                'operator': None,
-                'elapsed_time': timedelta()
-            },
-            2: {
-                'running': False,
-                'start_time': None,
-                'operator': None,
-                'elapsed_time': timedelta()
-            }
-        }
+        # Equipment tracking; every start, stop and elapsed time is read
+        # from the engine's clock
+        self.fleet = fleet or Fleet.load()
+        self.engine = RuntimeEngine(clock or datetime.now)
 
-        # Shift definitions
-        self.shifts = [
-            {'name': 'Shift 1', 'start': time(7, 30), 'end': time(14, 0)},
-            {'name': 'Shift 2', 'start': time(14, 0), 'end': time(22, 0)},
-            {'name': 'Shift 3', 'start': time(22, 0), 'end': time(6, 0)}
-        ]
+        # Shift definitions, shared with every logger and report
+        self.shift_calendar = shift_calendar or ShiftCalendar.load()
+
+        # Idle reasons offered when cranes stop, with their codes
+        self.idle_reasons = idle_reasons or IdleReasonRegistry.load()
+
+        # Operators on the roster and the cranes they hold this shift
+        self.roster = roster or OperatorRoster.load()
+        self.roster.shift = self.shift_key(self.now())
+
+        # Open barge and ship jobs and the cranes serving them
+        self.jobs = JobTracker()
+
+        # Running totals, rebuilt once from recent history. Callers that
+        # must not touch storage yet (the GUI before its first paint) load
+        # the history later and merge it in with merge_history
+        self.totals = RunningTotals()
+        self.history_days = history_days
+        if load_history:
+            self.rebuild_totals()
+
+    def rebuild_totals(self):
+        self.totals.clear()
+        self.merge_history(self.load_history())
+
+    def merge_history(self, history):
+        # Live events recorded before the history arrived are already in
+        # self.totals and are not in the history, so adding is exact
+        self.totals.merge(history)
+
+    def load_history(self):
+        # Only the last few days feed live views, so only those are read.
+        # Builds a separate RunningTotals so it can run off the GUI thread
+        totals = RunningTotals()
+        since = self.now().date() - timedelta(days=self.history_days)
+
+        for record in self.excel_handler.iter_records('Crane Data', start_date=since):
+            # Rows are already cut per shift and day, so they add up as stored
+            start_time = record['Start Time']
+            totals.add_crane_run(
+                record['Date'], 
+                record['Shift'], 
+                record['Crane Number'], 
+                record['Operator'], 
+                active_seconds(record), 
+                record['Idle Reason'], 
+                self.shift_calendar.shift_date(datetime.combine(record['Date'], start_time))
+                if start_time is not None else None
+            )
 
-        # Track used operators
-        self.used_operators = set()
+        for record in self.excel_handler.iter_records('Barge Data', start_date=since):
+            stop_time = datetime.combine(record['Date'], record['Stop Time'])
+            totals.add_barge(
+                record['Date'], 
+                self.shift_calendar.shift_name(stop_time), 
+                record['Tons Loaded'] or 0, 
+                self.shift_calendar.shift_date(stop_time)
+            )
+
+        for record in self.excel_handler.iter_records('Generator Data', start_date=since):
+            # Generator rows are only cut at midnight; they are cut at shift
+            # changes here the way log_generator counts them live
+            start_time = datetime.combine(record['Date'], record['Start Time'])
+            stop_time = start_time + timedelta(seconds=active_seconds(record))
+            for segment in self.shift_calendar.split(start_time, stop_time, by_day=True):
+                totals.add_generator_run(
+                    segment.day, segment.shift, record['Generator ID'], segment.seconds, 
+                    self.shift_calendar.shift_date(segment.start)
+                )
+
+        return totals
+
+    def record_event(self, event_type, unit, **fields):
+        if self.event_journal is None:
+            return
+        event = {'type': event_type, 'kind': unit.kind, 'id': unit.unit_id, 'at': self.now()}
+        event.update(fields)
+        self.event_journal.append(event)
+        if self.event_journal.checkpoint_due():
+            self.event_journal.checkpoint(self.snapshot())
+
+    def snapshot(self):
+        # Only units that are running or have an operator need restoring
+        units = []
+        for group in (self.fleet.cranes, self.fleet.generators):
+            for unit in group.values():
+                if unit.running or unit.operator:
+                    units.append({
+                        'kind': unit.kind,
+                        'id': unit.unit_id,
+                        'running': unit.running,
+                        'start_time': unit.start_time,
+                        'operator': unit.operator
+                    })
+        return {'units': units, 'jobs': self.jobs.snapshot(), 'at': self.now()}
+
+    def find_unit(self, kind, unit_id):
+        units = self.fleet.cranes if kind == 'crane' else self.fleet.generators
+        return units.get(unit_id)
+
+    def apply_event(self, event):
+        if event['type'].startswith('job_'):
+            self.apply_job_event(event)
+            return
+
+        unit = self.find_unit(event['kind'], event['id'])
+        if unit is None:
+            return  # Unit no longer in the fleet
+
+        if event['type'] == 'assign':
+            unit.operator = event['operator']
+        elif event['type'] == 'start':
+            unit.running = True
+            unit.start_time = datetime.fromisoformat(event['at'])
+            unit.operator = event.get('operator')
+        elif event['type'] == 'stop':
+            if unit.kind == 'crane' and unit.start_time:
+                self.jobs.add_crane_run(unit.unit_id, unit.start_time, datetime.fromisoformat(event['at']))
+            unit.running = False
+            unit.start_time = None
+            unit.operator = None
+        elif event['type'] == 'release':
+            unit.operator = None
+
+    def apply_job_event(self, event):
+        if event['type'] == 'job_start':
+            self.jobs.start(
+                event['kind'], event['name'], datetime.fromisoformat(event['at']), 
+                event.get('hatches'), event['id']
+            )
+            return
+        job = self.jobs.jobs.get(event['id'])
+        if job is None:
+            return
+        # Replayed units are in the state they had at the event, so open
+        # runs get the same share of the tons as they did live
+        at = datetime.fromisoformat(event['at'])
+        if event['type'] == 'job_link':
+            self.jobs.link_crane(job, event['crane'])
+        elif event['type'] == 'job_tons':
+            self.jobs.add_tons(job, event['tons'], event.get('hatch'), self.open_job_runs(job, at))
+        elif event['type'] == 'job_finish':
+            self.jobs.finish(job, event.get('tons'), self.open_job_runs(job, at))
+
+    def recover(self):
+        # Replay the last checkpoint and the events after it
+        if self.event_journal is None:
+            return
+        self.replay(*self.event_journal.read())
+
+    def replay(self, state, events):
+        # Also used on its own, without a journal to write to, by tools
+        # that only need to know what is running (compact)
+        last_at = None
+        if state:
+            last_at = state.get('at')
+            if 'jobs' in state:
+                self.jobs.restore(state['jobs'])
+            for entry in state['units']:
+                unit = self.find_unit(entry['kind'], entry['id'])
+                if unit is None:
+                    continue
+                unit.running = entry['running']
+                unit.start_time = datetime.fromisoformat(entry['start_time']) if entry['start_time'] else None
+                unit.operator = entry['operator']
+        for event in events:
+            self.apply_event(event)
+            last_at = event['at']
+        self.engine.reindex(self.fleet)
+
+        for crane in self.fleet.cranes.values():
+            if crane.operator:
+                self.roster.assign(crane.unit_id, crane.operator)
+        # Idle cranes keep an operator from before a restart only if the
+        # shift has not changed since the last recorded event
+        if last_at:
+            self.roster.shift = self.shift_key(datetime.fromisoformat(last_at))
+        self.roll_shift(self.now())
+
+    def now(self):
+        return self.engine.now()
 
     def get_current_shift(self):
-        now = datetime.now().time()
-        for shift in self.shifts:
-            if shift['name'] == 'Shift 3':
-                if now >= shift['start'] or now < time(6, 0):
-                    return shift['name']
-            else:
-                if shift['start'] <= now < shift['end']:
-                    return shift['name']
-        return 'Unknown Shift'
+        return self.shift_calendar.shift_name(self.now())
+
+    def shift_key(self, at):
+        return self.shift_calendar.shift_date(at), self.shift_calendar.shift_name(at)
+
+    def roll_shift(self, now):
+        # Called on every UI tick; cheap unless the shift has changed. The
+        # operators of idle cranes go back to the pool, running cranes keep
+        # theirs until they stop. Returns the cranes that lost an operator
+        shift = self.shift_key(now)
+        if shift == self.roster.shift:
+            return []
+        running = {crane.unit_id for crane, _ in self.engine.running_units('crane', now)}
+        released = self.roster.start_shift(shift, keep=running)
+        self.jobs.start_shift()
+        for crane_number in released:
+            crane = self.fleet.cranes.get(crane_number)
+            if crane is not None and crane.operator:
+                crane.operator = None
+                self.record_event('release', crane)
+        return released
 
     def start_crane(self, crane_number, operator):
-        if crane_number not in [1, 2]:
-            raise ValueError("Invalid crane number")
-        
-        self.crane_states[crane_number]['running'] = True
-        self.crane_states[crane_number]['start_time'] = datetime.now()
-        self.crane_states[crane_number]['operator'] = operator
-        
-        # Mark operator as used
-        self.used_operators.add(operator)
+        crane = self.fleet.crane(crane_number)
+        self.roster.assign(crane_number, operator)
+        crane.operator = operator
+        start_time = self.engine.start(crane)
+        self.record_event('start', crane, at=start_time, operator=operator)
 
-    def stop_crane(self, crane_number, idle_reason):
-        if crane_number not in [1, 2]:
-            raise ValueError("Invalid crane number")
-        
-        if not self.crane_states[crane_number]['running']:
+    @timed('cranelogger_stop_crane_seconds')
+    def stop_crane(self, crane_number, idle_reason, at=None):
+        crane = self.fleet.crane(crane_number)
+        operator = crane.operator
+        times = self.engine.stop(crane, at)
+        if times is None:
             return None
-
-        start_time = self.crane_states[crane_number]['start_time']
-        stop_time = datetime.now()
-        operator = self.crane_states[crane_number]['operator']
+        start_time, stop_time = times
 
         # Log data to Excel
         self.excel_handler.log_crane_data(
@@ -72,27 +430,160 @@ class DataManager:
             stop_time, 
             idle_reason
         )
+        # Runs that cross a shift change or midnight count towards each part,
+        # the same way log_crane_data cuts them into rows
+        segments = self.shift_calendar.split(start_time, stop_time, by_day=True)
+        for segment in segments:
+            self.totals.add_crane_run(
+                segment.day, 
+                segment.shift, 
+                crane_number, 
+                operator, 
+                segment.seconds, 
+                idle_reason if segment is segments[-1] else None, 
+                self.shift_calendar.shift_date(segment.start)
+            )
+
+        # The run counts towards the barge or ship the crane is serving
+        self.jobs.add_crane_run(crane_number, start_time, stop_time)
 
-        # Reset crane state
-        self.crane_states[crane_number]['running'] = False
-        self.crane_states[crane_number]['start_time'] = None
-        self.crane_states[crane_number]['operator'] = None
+        # The operator is free for another crane
+        crane.operator = None
+        self.roster.release(crane_number)
+        self.record_event('stop', crane, at=stop_time)
 
         return start_time, stop_time
 
+    def stop_cranes(self, crane_numbers, idle_reason):
+        # One stop time and one storage batch for the whole group
+        stop_time = self.now()
+        with self.excel_handler.batch():
+            return [self.stop_crane(crane_number, idle_reason, stop_time) for crane_number in crane_numbers]
+
+    def assign_operator(self, crane_number, operator):
+        crane = self.fleet.crane(crane_number)
+        self.roster.assign(crane_number, operator)
+        crane.operator = operator
+        self.record_event('assign', crane, operator=operator)
+
+    def start_generator(self, generator_id):
+        generator = self.fleet.generator(generator_id)
+        start_time = self.engine.start(generator)
+        self.record_event('start', generator, at=start_time)
+        return start_time
+
+    def stop_generator(self, generator_id, at=None):
+        generator = self.fleet.generator(generator_id)
+        times = self.engine.stop(generator, at)
+        if times is None:
+            return None
+
+        start_time, stop_time = times
+        self.log_generator(generator.name, start_time, stop_time)
+        self.record_event('stop', generator, at=stop_time)
+        return start_time, stop_time
+
+    def stop_generators(self, generator_ids):
+        stop_time = self.now()
+        with self.excel_handler.batch():
+            return [self.stop_generator(generator_id, stop_time) for generator_id in generator_ids]
+
+    def start_job(self, kind, name, hatches=None):
+        # kind is 'barge' or 'ship'; several of each can be open at once
+        if kind not in ('barge', 'ship'):
+            raise ValueError(f"Unknown job kind '{kind}'")
+        start_time = self.now()
+        job = self.jobs.start(kind, name, start_time, hatches)
+        self.record_event('job_start', job, at=start_time, name=name, hatches=hatches)
+        return job
+
+    def link_crane_to_job(self, job_id, crane_number):
+        self.fleet.crane(crane_number)
+        job = self.jobs.get(job_id)
+        self.jobs.link_crane(job, crane_number)
+        self.record_event('job_link', job, crane=crane_number)
+
+    def open_job_runs(self, job, at):
+        # crane -> seconds the job's linked, still running cranes have
+        # worked on it so far
+        runs = {}
+        for crane_number in self.jobs.linked_cranes(job):
+            crane = self.fleet.cranes.get(crane_number)
+            if crane is not None and crane.running:
+                runs[crane_number] = self.engine.elapsed_since(crane, job.start_time, at).total_seconds()
+        return runs
+
+    def job_crane_rates(self, now=None):
+        # Live tons per hour per crane, open runs included
+        now = now or self.now()
+        running = {}
+        for job in self.jobs.open_jobs():
+            running.update(self.open_job_runs(job, now))
+        return self.jobs.crane_rates(running)
+
+    def add_job_tons(self, job_id, tons, hatch=None):
+        # Progress reported while the job runs, e.g. per hatch on a ship
+        job = self.jobs.get(job_id)
+        at = self.now()
+        self.jobs.add_tons(job, tons, hatch, self.open_job_runs(job, at))
+        self.record_event('job_tons', job, at=at, tons=tons, hatch=hatch)
+
+    def finish_job(self, job_id, tons=None):
+        # tons is the job's total (tons loaded or ship quantity); reported
+        # progress counts towards it. The row carries the true start time
+        # and the cranes that served the job. It is logged before the job
+        # is closed, so a failed write leaves the job open to finish again
+        job = self.jobs.get(job_id)
+        stop_time = self.now()
+        total = max(tons, job.tons) if tons is not None else job.tons
+        cranes = ', '.join(str(crane_number) for crane_number in sorted(job.cranes)) or None
+        if job.kind == 'barge':
+            self.log_barge(job.name, job.start_time, stop_time, total, cranes)
+        else:
+            self.excel_handler.log_ship_data(
+                job.name, job.start_time, stop_time, total, job.hatches, cranes
+            )
+        self.jobs.finish(job, tons, self.open_job_runs(job, stop_time))
+        self.record_event('job_finish', job, at=stop_time, tons=tons)
+        return job.start_time, stop_time
+
+    def log_barge(self, barge_name, start_time, stop_time, tons_loaded, cranes=None):
+        self.excel_handler.log_barge_data(barge_name, start_time, stop_time, tons_loaded, cranes)
+        self.totals.add_barge(
+            stop_time.date(), self.shift_calendar.shift_name(stop_time), tons_loaded, 
+            self.shift_calendar.shift_date(stop_time)
+        )
+
+    def log_generator(self, generator_id, start_time, stop_time):
+        self.excel_handler.log_generator_data(generator_id, start_time, stop_time)
+        for segment in self.shift_calendar.split(start_time, stop_time, by_day=True):
+            self.totals.add_generator_run(
+                segment.day, segment.shift, generator_id, segment.seconds, 
+                self.shift_calendar.shift_date(segment.start)
+            )
+
     def get_crane_elapsed_time(self, crane_number):
-        if not self.crane_states[crane_number]['running']:
-            return timedelta()
-        
-        start_time = self.crane_states[crane_number]['start_time']
-        return datetime.now() - start_time
+        return self.engine.elapsed(self.fleet.crane(crane_number))
+
+    def get_crane_start_time(self, crane_number):
+        return self.fleet.crane(crane_number).start_time
 
     def is_crane_running(self, crane_number):
-        return self.crane_states[crane_number]['running']
+        return self.fleet.crane(crane_number).running
+
+    def is_generator_running(self, generator_id):
+        return self.fleet.generator(generator_id).running
+
+    def running_units(self, kind=None, now=None):
+        return self.engine.running_units(kind, now)
+
+    def get_available_operators(self):
+        return self.roster.available_operators()
 
-    def get_available_operators(self, initial_operators):
-        # Return operators not yet used
-        return [op for op in initial_operators if op not in self.used_operators]
+    def search_operators(self, text, limit=20):
+        return self.roster.search(text, limit)
 
     def reset_crane_timer(self, crane_number):
-        self.crane_states[crane_number]['start_time'] = datetime.now()
\ No newline at end of file
+        crane = self.fleet.crane(crane_number)
+        if crane.running:
+            crane.start_time = self.now()
\ No newline at end of file
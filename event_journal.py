@@ -0,0 +1,57 @@
+import json
+import os
+
+class EventJournal:
+    # Fsync'd append-only log of equipment start/stop/assign events. Every
+    # checkpoint_every events the current state replaces the log as a single
+    # checkpoint record, so replay only reads the tail since then
+    def __init__(self, filename='crane_events.journal', checkpoint_every=100):
+        self.filename = filename
+        self.checkpoint_every = checkpoint_every
+        self.events_since_checkpoint = 0
+
+    def append(self, event):
+        with open(self.filename, 'a', encoding='utf-8') as journal:
+            journal.write(json.dumps(event, default=str) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.events_since_checkpoint += 1
+
+    def checkpoint_due(self):
+        return self.events_since_checkpoint >= self.checkpoint_every
+
+    def checkpoint(self, state):
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as journal:
+            journal.write(json.dumps({'type': 'checkpoint', 'state': state}, default=str) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temp_filename, self.filename)
+        self.events_since_checkpoint = 0
+
+    def read(self):
+        # Returns the last checkpointed state (or None) and the events after it
+        if not os.path.exists(self.filename):
+            return None, []
+
+        with open(self.filename, 'rb+') as journal:
+            data = journal.read()
+            # Cut a torn trailing record so new appends start on a fresh line
+            if data and not data.endswith(b'\n'):
+                data = data[:data.rfind(b'\n') + 1]
+                journal.truncate(len(data))
+
+        state = None
+        events = []
+        for line in data.decode('utf-8').splitlines():
+            event = json.loads(line)
+            if event['type'] == 'checkpoint':
+                state = event['state']
+                events = []
+            else:
+                events.append(event)
+
+        self.events_since_checkpoint = len(events)
+        return state, events
+
+__all__ = ['EventJournal']
\ No newline at end of file
@@ -1,128 +1,414 @@
-import openpyxl
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, date, time, timedelta
 import os
+import re
+import queue
+import threading
+
+from idle_reasons import IdleReasonRegistry
+from metrics import timed
+from shift_calendar import ShiftCalendar, split_days
+from storage import SHEET_HEADERS, open_store
+
+def parse_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+def parse_time(value):
+    if value is None or isinstance(value, time):
+        return value
+    if isinstance(value, datetime):
+        return value.time()
+    return time.fromisoformat(str(value))
+
+DURATION_PATTERN = re.compile(
+    r'^(?:(-?\d+) days?, )?(\d+):(\d{2}):(\d{2})(?:\.(\d{1,6}))?$'
+)
+
+def parse_duration(value):
+    # Inverse of str(timedelta), e.g. '1 day, 2:03:04.500000'
+    if value is None or isinstance(value, timedelta):
+        return value
+    match = DURATION_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid duration '{value}'")
+    days, hours, minutes, seconds, fraction = match.groups()
+    return timedelta(
+        days=int(days or 0),
+        hours=int(hours),
+        minutes=int(minutes),
+        seconds=int(seconds),
+        microseconds=int((fraction or '0').ljust(6, '0'))
+    )
+
+# Columns that need parsing back from the strings the log_* methods write
+COLUMN_PARSERS = {
+    'Date': parse_date,
+    'Start Date': parse_date,
+    'Start Time': parse_time,
+    'Stop Time': parse_time,
+    'Finished Time': parse_time,
+    'Active Duration': parse_duration
+}
+
+def active_seconds(record):
+    # Rows written before 'Active Seconds' existed only have the display string
+    seconds = record.get('Active Seconds')
+    if seconds is None:
+        return record['Active Duration'].total_seconds()
+    return float(seconds)
+
+def iter_records(rows, sheet_name, columns=None, start_date=None, end_date=None):
+    # Turn raw sheet rows into dicts of typed values for the projected columns
+    headers = SHEET_HEADERS[sheet_name]
+    columns = columns or headers
+    indexes = [headers.index(column) for column in columns]
+    parsers = [COLUMN_PARSERS.get(column) for column in columns]
+    filter_dates = start_date is not None or end_date is not None
+
+    for row in rows:
+        if filter_dates:
+            # Check the date before paying for parsing the rest of the row
+            row_date = parse_date(row[0])
+            if row_date is None:
+                continue
+            if start_date is not None and row_date < start_date:
+                continue
+            if end_date is not None and row_date > end_date:
+                continue
+
+        record = {}
+        for column, index, parser in zip(columns, indexes, parsers):
+            value = row[index] if index < len(row) else None
+            record[column] = parser(value) if parser else value
+        yield record
+
+def read_history(filename, sheet_name, columns=None, start_date=None, end_date=None):
+    # Lazily read a crane_operations.xlsx-style workbook in read-only mode;
+    # only the cells up to the last projected column are materialised
+    headers = SHEET_HEADERS[sheet_name]
+    needed = [headers.index(column) for column in (columns or headers)] + [0]
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(
+            min_row=2, max_col=max(needed) + 1, values_only=True
+        )
+        yield from iter_records(rows, sheet_name, columns, start_date, end_date)
+    finally:
+        workbook.close()
 
 class ExcelHandler:
-    def __init__(self, filename='crane_operations.xlsx'):
-        self.filename = filename
-        self.create_workbook_if_not_exists()
-
-    def create_workbook_if_not_exists(self):
-        if not os.path.exists(self.filename):
-            workbook = openpyxl.Workbook()
-            
-            # Create sheets
-            sheets = ['Crane Data', 'Barge Data', 'Generator Data', 'Ship Data']
-            for sheet_name in sheets:
-                if sheet_name not in workbook.sheetnames:
-                    workbook.create_sheet(sheet_name)
-            
-            # Remove default sheet
-            if 'Sheet' in workbook.sheetnames:
-                workbook.remove(workbook['Sheet'])
-            
-            # Add headers to each sheet
-            self.add_headers(workbook)
-            
-            workbook.save(self.filename)
-
-    def add_headers(self, workbook):
-        # Crane Data Sheet Headers
-        crane_headers = [
-            'Date', 'Shift', 'Crane Number', 'Operator', 
-            'Start Time', 'Stop Time', 'Active Duration', 'Idle Reason'
-        ]
-        workbook['Crane Data'].append(crane_headers)
+    def __init__(self, filename=None, backend=None, shift_calendar=None, idle_reasons=None, 
+                 **store_options):
+        # The backend can be picked at startup through CRANELOGGER_BACKEND
+        # ('xlsx', 'partitioned', 'sqlite' or 'daemon') and CRANELOGGER_STORE
+        # (file path, partition directory or daemon address) without
+        # changing any caller
+        self.backend = backend or os.environ.get('CRANELOGGER_BACKEND', 'xlsx')
+        filename = filename or os.environ.get('CRANELOGGER_STORE')
+        self.store = open_store(self.backend, filename, **store_options)
+        self.filename = self.store.filename
+        self.shift_calendar = shift_calendar or ShiftCalendar.load()
+        self.idle_reasons = idle_reasons or IdleReasonRegistry.load()
 
-        # Barge Data Sheet Headers
-        barge_headers = [
-            'Date', 'Barge Name/ID', 'Start Time', 'Stop Time', 
-            'Tons Loaded'
-        ]
-        workbook['Barge Data'].append(barge_headers)
+    def append_row(self, sheet_name, row):
+        self.store.append(sheet_name, row)
 
-        # Generator Data Sheet Headers
-        generator_headers = [
-            'Date', 'Generator ID', 'Start Time', 'Stop Time', 
-            'Active Duration'
-        ]
-        workbook['Generator Data'].append(generator_headers)
+    def append_rows(self, records):
+        # records: (sheet name, row) pairs, written in one store call
+        self.store.append_many(records)
 
-        # Ship Data Sheet Headers
-        ship_headers = [
-            'Date', 'Ship Name', 'Start Time', 'Finished Time', 
-            'Quantity', 'Number of Hatches'
-        ]
-        workbook['Ship Data'].append(ship_headers)
+    def flush_if_due(self):
+        return self.store.flush_if_due()
 
-    def log_crane_data(self, crane_number, operator, start_time, stop_time, idle_reason):
-        workbook = openpyxl.load_workbook(self.filename)
-        sheet = workbook['Crane Data']
-        
-        # Determine shift
-        def determine_shift(time):
-            hour = time.hour
-            if 7 <= hour < 14:
-                return 'Shift 1'
-            elif 14 <= hour < 22:
-                return 'Shift 2'
-            else:
-                return 'Shift 3'
+    @property
+    def flush_failed(self):
+        return self.store.flush_failed
 
-        row = [
-            datetime.now().date(),
-            determine_shift(start_time),
-            crane_number,
-            operator,
-            start_time.strftime('%H:%M:%S'),
-            stop_time.strftime('%H:%M:%S'),
-            str(stop_time - start_time),
-            idle_reason
+    def flush(self):
+        self.store.flush()
+
+    def begin_batch(self):
+        self.store.begin_batch()
+
+    def end_batch(self):
+        self.store.end_batch()
+
+    @contextmanager
+    def batch(self):
+        with self.store.batch():
+            yield self
+
+    def close(self):
+        self.store.close()
+
+    def iter_records(self, sheet_name, columns=None, start_date=None, end_date=None):
+        rows = self.store.iter_rows(sheet_name, start_date, end_date)
+        return iter_records(rows, sheet_name, columns)
+
+    def export_xlsx(self, filename, start_date=None, end_date=None):
+        # Stream the history into a write-only workbook in the four-sheet
+        # layout; rows go straight to disk so memory stays flat
+        import openpyxl
+
+        self.store.flush()
+        workbook = openpyxl.Workbook(write_only=True)
+        for sheet_name, headers in SHEET_HEADERS.items():
+            sheet = workbook.create_sheet(sheet_name)
+            sheet.append(headers)
+            for row in self.store.iter_rows(sheet_name, start_date, end_date):
+                sheet.append(row)
+        workbook.save(filename)
+
+    # Row builders shared by the log_* methods and bulk ingest; logged_on
+    # defaults to today like a live log entry. Runs are dated by the times
+    # they cover instead: one row per shift and calendar day, each with its
+    # own duration in seconds, and the idle reason and its code on the row
+    # where the crane actually stopped
+    def crane_rows(self, crane_number, operator, start_time, stop_time, idle_reason):
+        segments = self.shift_calendar.split(start_time, stop_time, by_day=True)
+        idle_code = self.idle_reasons.code_for(idle_reason)
+        return [
+            [
+                segment.day,
+                segment.shift,
+                crane_number,
+                operator,
+                segment.start.strftime('%H:%M:%S'),
+                segment.end.strftime('%H:%M:%S'),
+                str(segment.end - segment.start),
+                idle_reason if segment is segments[-1] else None,
+                segment.seconds,
+                idle_code if segment is segments[-1] else None
+            ]
+            for segment in segments
         ]
-        sheet.append(row)
-        workbook.save(self.filename)
-
-    def log_barge_data(self, barge_name, start_time, stop_time, tons_loaded):
-        workbook = openpyxl.load_workbook(self.filename)
-        sheet = workbook['Barge Data']
-        
-        row = [
-            datetime.now().date(),
+
+    def barge_row(self, barge_name, start_time, stop_time, tons_loaded, logged_on=None, cranes=None):
+        # cranes: the cranes that loaded it, as text ('1, 2'). Start Date
+        # places the start time when the job ran past midnight
+        return [
+            logged_on or datetime.now().date(),
             barge_name,
             start_time.strftime('%H:%M:%S'),
             stop_time.strftime('%H:%M:%S'),
-            tons_loaded
+            tons_loaded,
+            cranes,
+            start_time.date().isoformat()
         ]
-        sheet.append(row)
-        workbook.save(self.filename)
 
-    def log_generator_data(self, generator_id, start_time, stop_time):
-        workbook = openpyxl.load_workbook(self.filename)
-        sheet = workbook['Generator Data']
-        
-        row = [
-            datetime.now().date(),
-            generator_id,
-            start_time.strftime('%H:%M:%S'),
-            stop_time.strftime('%H:%M:%S'),
-            str(stop_time - start_time)
+    def generator_rows(self, generator_id, start_time, stop_time):
+        return [
+            [
+                segment.day,
+                generator_id,
+                segment.start.strftime('%H:%M:%S'),
+                segment.end.strftime('%H:%M:%S'),
+                str(segment.end - segment.start),
+                segment.seconds
+            ]
+            for segment in split_days(start_time, stop_time)
         ]
-        sheet.append(row)
-        workbook.save(self.filename)
-
-    def log_ship_data(self, ship_name, start_time=None, finished_time=None, quantity=None, hatches=None):
-        workbook = openpyxl.load_workbook(self.filename)
-        sheet = workbook['Ship Data']
-        
-        row = [
-            datetime.now().date(),
+
+    def ship_row(self, ship_name, start_time=None, finished_time=None, quantity=None, hatches=None, 
+                 logged_on=None, cranes=None):
+        return [
+            logged_on or datetime.now().date(),
             ship_name,
             start_time.strftime('%H:%M:%S') if start_time else None,
             finished_time.strftime('%H:%M:%S') if finished_time else None,
             quantity,
-            hatches
+            hatches,
+            cranes,
+            start_time.date().isoformat() if start_time else None
         ]
-        sheet.append(row)
-        workbook.save(self.filename)
 
-__all__ = ['ExcelHandler']
\ No newline at end of file
+    @timed('cranelogger_log_seconds', kind='crane')
+    def log_crane_data(self, crane_number, operator, start_time, stop_time, idle_reason):
+        rows = self.crane_rows(crane_number, operator, start_time, stop_time, idle_reason)
+        self.append_rows(('Crane Data', row) for row in rows)
+
+    @timed('cranelogger_log_seconds', kind='barge')
+    def log_barge_data(self, barge_name, start_time, stop_time, tons_loaded, cranes=None):
+        row = self.barge_row(barge_name, start_time, stop_time, tons_loaded, cranes=cranes)
+        self.append_row('Barge Data', row)
+
+    @timed('cranelogger_log_seconds', kind='generator')
+    def log_generator_data(self, generator_id, start_time, stop_time):
+        rows = self.generator_rows(generator_id, start_time, stop_time)
+        self.append_rows(('Generator Data', row) for row in rows)
+
+    @timed('cranelogger_log_seconds', kind='ship')
+    def log_ship_data(self, ship_name, start_time=None, finished_time=None, quantity=None, hatches=None, 
+                      cranes=None):
+        row = self.ship_row(ship_name, start_time, finished_time, quantity, hatches, cranes=cranes)
+        self.append_row('Ship Data', row)
+
+class BackgroundWriter:
+    # Runs ExcelHandler calls on a dedicated thread so callers never wait on disk.
+    # Pass open_handler instead of a handler to open the store on that thread
+    # too, and autostart=False to queue calls before any storage is touched.
+    # If opening fails, queued calls wait and opening is retried with a
+    # growing delay, up to max_retry_delay seconds
+    def __init__(self, excel_handler=None, max_pending=1000, on_error=None, idle_interval=1.0, 
+                 open_handler=None, autostart=True, max_retry_delay=60.0):
+        self.excel_handler = excel_handler
+        self.open_handler = open_handler
+        self.on_error = on_error
+        # How often an idle writer checks the handler's flush interval
+        self.idle_interval = idle_interval
+        self.max_retry_delay = max_retry_delay
+        self.open_failed = False
+        # Text of the failure last reported, until the store flushes again
+        self.last_failure = None
+        self.stopping = threading.Event()
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='excel-writer', daemon=True)
+        if autostart:
+            self.start()
+
+    def start(self):
+        if self.thread.ident is None:
+            self.thread.start()
+
+    def open(self):
+        # Returns whether there is a handler. Only the first failure is
+        # reported; retries stay quiet until one succeeds
+        try:
+            if self.excel_handler is None:
+                self.excel_handler = self.open_handler()
+            self.open_failed = False
+            return True
+        except Exception as e:
+            if not self.open_failed:
+                self.report_error(f'Opening storage failed: {e}. Rows are kept and opening is retried')
+            self.open_failed = True
+            return False
+        finally:
+            self.ready.set()
+
+    def run(self):
+        delay = self.idle_interval
+        while not self.open():
+            if self.stopping.wait(delay):
+                return
+            delay = min(delay * 2, self.max_retry_delay)
+
+        while True:
+            try:
+                item = self.queue.get(timeout=self.idle_interval)
+            except queue.Empty:
+                self.call('flush_if_due')
+                continue
+
+            try:
+                if item is None:
+                    return
+                method, args, kwargs = item
+                self.call(method, *args, **kwargs)
+            finally:
+                self.queue.task_done()
+
+    def call(self, method, *args, **kwargs):
+        name = getattr(method, '__name__', method)
+        try:
+            if callable(method):
+                method(*args, **kwargs)
+            else:
+                getattr(self.excel_handler, method)(*args, **kwargs)
+        except Exception as e:
+            # A failure that keeps repeating (the workbook left open in
+            # Excel) is reported once, until a flush goes through
+            if str(e) != self.last_failure:
+                self.last_failure = str(e)
+                self.report_error(f'{name} failed: {e}')
+        else:
+            if not getattr(self.excel_handler, 'flush_failed', False):
+                self.last_failure = None
+
+    def report_error(self, message):
+        if self.on_error:
+            self.on_error(message)
+
+    def submit(self, method, *args, **kwargs):
+        item = (method, args, kwargs)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Never drop a row; tell the caller and wait for the writer to catch up
+            self.report_error('Write queue is full, waiting for pending writes')
+            self.queue.put(item)
+
+    def submit_task(self, task, on_done=None):
+        # Run task on the writer thread after everything queued before it;
+        # on_done receives the result there, so GUI callers pass a signal
+        def run_task():
+            result = task()
+            if on_done:
+                on_done(result)
+        run_task.__name__ = task.__name__
+        self.submit(run_task)
+
+    def log_crane_data(self, *args, **kwargs):
+        self.submit('log_crane_data', *args, **kwargs)
+
+    def log_barge_data(self, *args, **kwargs):
+        self.submit('log_barge_data', *args, **kwargs)
+
+    def log_generator_data(self, *args, **kwargs):
+        self.submit('log_generator_data', *args, **kwargs)
+
+    def log_ship_data(self, *args, **kwargs):
+        self.submit('log_ship_data', *args, **kwargs)
+
+    def iter_records(self, *args, **kwargs):
+        # Reads bypass the queue; the stores support a concurrent reader
+        self.ready.wait()
+        if self.excel_handler is None:
+            raise RuntimeError('Storage is not available')
+        return self.excel_handler.iter_records(*args, **kwargs)
+
+    @contextmanager
+    def batch(self):
+        self.submit('begin_batch')
+        try:
+            yield self
+        finally:
+            self.submit('end_batch')
+
+    def flush(self):
+        # Wait for queued rows and commit them to the workbook
+        if self.queue.unfinished_tasks:
+            # Rows queued before the writer was started are never dropped
+            self.start()
+        if self.open_failed:
+            return  # Nothing can be committed until storage opens
+        if self.thread.is_alive():
+            self.submit('flush')
+            self.queue.join()
+
+    def close(self):
+        self.flush()
+        if self.open_failed:
+            pending = self.queue.qsize()
+            if pending:
+                self.report_error(f'Storage never opened; {pending} queued writes were not saved')
+            self.stopping.set()
+            self.thread.join()
+            return
+        if self.thread.is_alive():
+            self.submit('close')
+            self.queue.put(None)
+            self.thread.join()
+
+__all__ = [
+    'ExcelHandler', 'BackgroundWriter', 'SHEET_HEADERS', 
+    'iter_records', 'read_history', 'parse_date', 'parse_time', 'parse_duration', 
+    'active_seconds'
+]
\ No newline at end of file
@@ -2,16 +2,21 @@ import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QPushButton, QTabWidget, 
                              QFormLayout, QLineEdit, QComboBox, QMessageBox, 
-                             QDialog, QCompleter)
-from PyQt5.QtCore import QTimer, QTime, Qt, QDateTime
-from PyQt5.QtGui import QFont, QColor,QDoubleValidator
+                             QDialog, QCompleter, QGridLayout, QScrollArea, 
+                             QShortcut, QTableView, QHeaderView, QListWidget)
+from PyQt5.QtCore import QTimer, Qt, QObject, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QFont, QColor,QDoubleValidator, QKeySequence, QBrush
 from datetime import datetime, timedelta
+from time import perf_counter
 
-from excel_handler import ExcelHandler
+from excel_handler import ExcelHandler, BackgroundWriter
 from data_manager import DataManager
+from event_journal import EventJournal
+from idle_reasons import OTHER_CODE
+from metrics import METRICS, PROFILER, timed
 
 class SearchableComboBox(QComboBox):
-    def __init__(self, parent=None):
+    def __init__(self, items, parent=None):
         super().__init__(parent)
         self.setEditable(True)
         
@@ -22,45 +27,200 @@ class SearchableComboBox(QComboBox):
         self.setCompleter(self.completer)
         
         # Populate the completer
-        self.addItems([
-            'Maintenance', 
-            'Operator Break', 
-            'Equipment Issue', 
-            'Material Shortage', 
-            'Mechanical Failure',
-            'Weather Conditions',
-            'Waiting for Cargo',
-            'Shift Change',
-            'Other'
-        ])
+        self.addItems(items)
+
+class WriterSignals(QObject):
+    # Emitted from the writer thread, delivered on the GUI thread
+    write_failed = pyqtSignal(str)
+    history_loaded = pyqtSignal(object)
+    # Callables to run on the GUI thread, e.g. profiler toggles from the
+    # metrics endpoint; cProfile only sees the thread that starts it
+    gui_call_requested = pyqtSignal(object)
+
+# Parsed once for the whole window; buttons switch between the two looks
+# through their 'running' property instead of a new stylesheet per toggle
+WINDOW_STYLE = """
+    QPushButton[running="false"] { 
+        background-color: green; 
+        color: white; 
+        font-weight: bold; 
+    }
+    QPushButton[running="true"] { 
+        background-color: red; 
+        color: white; 
+        font-weight: bold; 
+    }
+"""
+
+def set_running_style(button, running):
+    button.setProperty('running', running)
+    # Re-polishing applies the already parsed rule for the new property value
+    button.style().unpolish(button)
+    button.style().polish(button)
+
+# Dashboard status cell colours, built once and shared by every row
+RUNNING_BRUSH = QBrush(QColor('red'))
+STOPPED_BRUSH = QBrush(QColor('green'))
+STATUS_TEXT_BRUSH = QBrush(QColor('white'))
+
+def format_elapsed(elapsed):
+    hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}'
+
+class UiTicker(QObject):
+    # One timer for the whole window: each tick reads the engine clock once,
+    # asks the engine for the running units and their elapsed time, and
+    # refreshes the timer labels of those that are on screen
+    def __init__(self, engine, parent=None, interval=1000):
+        super().__init__(parent)
+        self.engine = engine
+        self.listeners = []
+        self.labels = {}   # (kind, unit id) -> timer label
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(interval)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def watch(self, key, label):
+        self.labels[key] = label
+        unit = self.engine.running.get(key)
+        if unit is not None:
+            label.setText(format_elapsed(self.engine.elapsed(unit)))
+
+    def unwatch(self, key):
+        self.labels.pop(key, None)
+
+    @timed('cranelogger_ui_tick_seconds')
+    def tick(self):
+        now = self.engine.now()
+        for callback in self.listeners:
+            callback(now)
+        for unit, elapsed in self.engine.running_units(now=now):
+            label = self.labels.get((unit.kind, unit.unit_id))
+            if label is not None and label.isVisible():
+                label.setText(format_elapsed(elapsed))
+
+class FleetTableModel(QAbstractTableModel):
+    # Read-only view of every unit in the fleet. refresh() recomputes the
+    # display values and emits dataChanged only for the cells that changed,
+    # so a 1 Hz tick over hundreds of rows repaints just the running timers
+    HEADERS = ['Unit', 'Status', 'Operator', 'Running Time', 'Active Today']
+    STATUS_COLUMN = 1
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        fleet = data_manager.fleet
+        self.units = list(fleet.cranes.values()) + list(fleet.generators.values())
+        now = data_manager.now()
+        self.values = [self.row_values(unit, now) for unit in self.units]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.units)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.values[index.row()][index.column()]
+        if index.column() == self.STATUS_COLUMN:
+            if role == Qt.BackgroundRole:
+                return RUNNING_BRUSH if self.units[index.row()].running else STOPPED_BRUSH
+            if role == Qt.ForegroundRole:
+                return STATUS_TEXT_BRUSH
+        return None
+
+    def row_values(self, unit, now):
+        today = now.date()
+        totals = self.data_manager.totals
+        if unit.kind == 'crane':
+            active = totals.crane_active(today, unit.unit_id)
+        else:
+            active = totals.generator_runtime(today, unit.name)
+
+        engine = self.data_manager.engine
+        running_time = format_elapsed(engine.elapsed(unit, now))
+        # Only the part of the current run since midnight counts for today
+        active += engine.elapsed_since(unit, datetime.combine(today, datetime.min.time()), now)
+
+        return (
+            unit.name, 
+            'Running' if unit.running else 'Stopped', 
+            unit.operator or '', 
+            running_time, 
+            format_elapsed(active)
+        )
+
+    def refresh(self, now):
+        for row, unit in enumerate(self.units):
+            values = self.row_values(unit, now)
+            previous = self.values[row]
+            if values == previous:
+                continue
+            self.values[row] = values
+            changed = [column for column, value in enumerate(values) if value != previous[column]]
+            self.dataChanged.emit(self.index(row, changed[0]), self.index(row, changed[-1]))
 
 class CraneOperationSystem(QMainWindow):
+    # Emitted once the first frame is on screen, before storage is opened
+    first_painted = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         
-        # Initial list of operators
-        self.initial_operators = [
-            'John Doe', 
-            'Jane Smith', 
-            'Mike Johnson', 
-            'Sarah Williams',
-            'Alex Brown',
-            'Emily Davis'
-        ]
-        
         # Initialize Excel and Data Management
-        self.excel_handler = ExcelHandler()
-        self.data_manager = DataManager(self.excel_handler)
-        # Initialize crane_timer_labels before initUI
-        self.crane_timer_labels = {
-        1: None,
-        2: None
-        }
+        # Writes go through a background thread so the GUI never blocks on disk.
+        # The store is opened on that thread, and only after the first paint
+        self.writer_signals = WriterSignals()
+        self.writer_signals.write_failed.connect(self.show_write_error)
+        self.excel_handler = BackgroundWriter(
+            open_handler=ExcelHandler, 
+            on_error=self.writer_signals.write_failed.emit, 
+            autostart=False
+        )
+        self.data_manager = DataManager(
+            self.excel_handler, event_journal=EventJournal(), load_history=False
+        )
+        # Restore running equipment from the event journal
+        self.data_manager.recover()
+        # Finish committing rows left in the storage journal by a crash
+        self.excel_handler.submit('flush')
+        # Recent history is read behind the scenes and merged on the GUI thread
+        self.writer_signals.history_loaded.connect(self.data_manager.merge_history)
+        self.excel_handler.submit_task(
+            self.data_manager.load_history, 
+            on_done=self.writer_signals.history_loaded.emit
+        )
+        self.painted = False
+        self.writer_signals.gui_call_requested.connect(self.run_gui_call)
+        # Per-unit widgets, filled in from the fleet registry by initUI
+        self.crane_timer_labels = {}
+        self.crane_buttons = {}
+        self.crane_status_labels = {}
+        self.crane_operator_labels = {}
+        self.generator_buttons = {}
+        self.generator_status_labels = {}
+        self.generator_timer_labels = {}
+        self.job_lists = {}
+        self.job_rate_labels = {}
         self.initUI()
+        self.restore_running_equipment()
 
     def initUI(self):
         self.setWindowTitle('Crane Operation Management System')
         self.setGeometry(100, 100, 800, 600)
+        self.setStyleSheet(WINDOW_STYLE)
 
         # Main widget and layout
         main_widget = QWidget()
@@ -71,17 +231,17 @@ class CraneOperationSystem(QMainWindow):
         # Shift and Time Display
         self.shift_label = QLabel()
         self.time_label = QLabel()
-        self.update_time_and_shift()
+        self.update_time_and_shift(self.data_manager.now())
         
         time_layout = QHBoxLayout()
         time_layout.addWidget(self.shift_label)
         time_layout.addWidget(self.time_label)
         main_layout.addLayout(time_layout)
 
-        # Timer to update time
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_time_and_shift)
-        self.timer.start(1000)  # Update every second
+        # Single shared tick for the clock and all running timers
+        self.ticker = UiTicker(self.data_manager.engine, self)
+        self.ticker.add_listener(self.update_time_and_shift)
+        self.ticker.add_listener(self.release_operators_on_shift_change)
 
         # Tab Widget
         self.tab_widget = QTabWidget()
@@ -92,49 +252,95 @@ class CraneOperationSystem(QMainWindow):
         self.barges_tab = self.create_barges_tab()
         self.generators_tab = self.create_generators_tab()
         self.ships_tab = self.create_ships_tab()
+        self.dashboard_tab = self.create_dashboard_tab()
 
         self.tab_widget.addTab(self.cranes_tab, "Cranes")
         self.tab_widget.addTab(self.barges_tab, "Barges")
         self.tab_widget.addTab(self.generators_tab, "Generators")
         self.tab_widget.addTab(self.ships_tab, "Ships")
+        self.tab_widget.addTab(self.dashboard_tab, "Dashboard")
 
-        # Crane Running Timers
-        self.crane_timers = {
-            1: QTimer(self),
-            2: QTimer(self)
-        }
-        
-        
+        # Labels on a newly shown tab are refreshed right away
+        self.tab_widget.currentChanged.connect(lambda index: self.ticker.tick())
+
+        # Start or stop cProfile/tracemalloc capture while the app runs
+        QShortcut(QKeySequence('Ctrl+Shift+P'), self, self.toggle_profiling)
+
+    def restore_running_equipment(self):
+        for crane in self.data_manager.fleet.cranes.values():
+            if crane.operator:
+                self.crane_operator_labels[crane.unit_id].setText(crane.operator)
+            if crane.running:
+                self.crane_buttons[crane.unit_id].setText('Stop')
+                set_running_style(self.crane_buttons[crane.unit_id], True)
+                self.crane_status_labels[crane.unit_id].setText('Running')
+                self.start_crane_timer(crane.unit_id, self.crane_timer_labels[crane.unit_id])
+
+        for generator in self.data_manager.fleet.generators.values():
+            if generator.running:
+                self.generator_buttons[generator.unit_id].setText('Stop')
+                set_running_style(self.generator_buttons[generator.unit_id], True)
+                self.generator_status_labels[generator.unit_id].setText('Running')
+                self.ticker.watch(
+                    ('generator', generator.unit_id), 
+                    self.generator_timer_labels[generator.unit_id]
+                )
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.first_painted.emit()
+            # Storage I/O starts on the next pass of the event loop
+            QTimer.singleShot(0, self.excel_handler.start)
+
+    def run_gui_call(self, action):
+        self.report_profile(action())
+
+    def toggle_profiling(self):
+        self.report_profile(PROFILER.toggle())
 
-    def update_time_and_shift(self):
-        current_time = QTime.currentTime()
-        self.time_label.setText(current_time.toString('hh:mm:ss'))
+    def report_profile(self, written):
+        if PROFILER.active:
+            self.statusBar().showMessage('Profiling started', 5000)
+        elif isinstance(written, list) and written:
+            self.statusBar().showMessage(f'Profile written to {", ".join(written)}', 10000)
+
+    def show_write_error(self, message):
+        QMessageBox.warning(self, 'Logging Error', message)
+
+    def flush_storage(self):
+        # Flush pending rows and stop the writer thread
+        self.excel_handler.close()
+
+    def update_time_and_shift(self, now):
+        self.time_label.setText(now.strftime('%H:%M:%S'))
         
-        current_shift = self.data_manager.get_current_shift()
-        self.shift_label.setText(f'Current Shift: {current_shift}')
+        current_shift = self.data_manager.shift_calendar.shift_name(now)
+        crew = self.data_manager.shift_calendar.crew(now)
+        self.shift_label.setText(f'Current Shift: {current_shift}' + (f' ({crew})' if crew else ''))
 
-    def create_cranes_tab(self):
+    def create_cranes_tab(self, columns=4):
         crane_widget = QWidget()
-        crane_layout = QHBoxLayout()
+        crane_layout = QVBoxLayout()
+        crane_grid = QGridLayout()
         
         # Function to create crane box
-        def create_crane_box(crane_number):
+        def create_crane_box(crane):
+            crane_number = crane.unit_id
             crane_box = QVBoxLayout()
-            crane_label = QLabel(f'Crane {crane_number}')
+            crane_label = QLabel(crane.name)
             crane_status = QLabel('Stopped')
             crane_timer = QLabel('00:00:00')
             self.crane_timer_labels[crane_number] = crane_timer
+            self.crane_status_labels[crane_number] = crane_status
             crane_operator = QLabel('No Operator')
+            self.crane_operator_labels[crane_number] = crane_operator
             
             # Start/Stop Button
             crane_start_stop = QPushButton('Start')
-            crane_start_stop.setStyleSheet("""
-                QPushButton { 
-                    background-color: green; 
-                    color: white; 
-                    font-weight: bold; 
-                }
-            """)
+            set_running_style(crane_start_stop, False)
+            self.crane_buttons[crane_number] = crane_start_stop
             
             crane_start_stop.clicked.connect(
                 lambda checked, cn=crane_number, 
@@ -162,24 +368,45 @@ class CraneOperationSystem(QMainWindow):
             
             return crane_box
 
-        # Crane 1
-        crane1_box = create_crane_box(1)
+        # One box per crane in the fleet, laid out in a scrollable grid
+        for index, crane in enumerate(self.data_manager.fleet.cranes.values()):
+            row, column = divmod(index, columns)
+            crane_grid.addLayout(create_crane_box(crane), row, column)
         
-        # Crane 2
-        crane2_box = create_crane_box(2)
+        grid_widget = QWidget()
+        grid_widget.setLayout(crane_grid)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(grid_widget)
         
-        # Stop Both Cranes
-        stop_both_button = QPushButton('Stop Both Cranes')
-        stop_both_button.clicked.connect(self.stop_both_cranes)
+        # Stop All Cranes
+        stop_all_button = QPushButton('Stop All Cranes')
+        stop_all_button.clicked.connect(self.stop_all_cranes)
         
-        crane_layout.addLayout(crane1_box)
-        crane_layout.addLayout(crane2_box)
+        crane_layout.addWidget(scroll_area)
+        crane_layout.addWidget(stop_all_button)
         
         crane_widget.setLayout(crane_layout)
-        crane_widget.layout().addWidget(stop_both_button)
         
         return crane_widget
     
+    def create_dashboard_tab(self):
+        # Whole-fleet overview for a control-room screen
+        self.fleet_model = FleetTableModel(self.data_manager, self)
+        self.fleet_view = QTableView()
+        self.fleet_view.setModel(self.fleet_model)
+        self.fleet_view.verticalHeader().setVisible(False)
+        self.fleet_view.setEditTriggers(QTableView.NoEditTriggers)
+        self.fleet_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Rows all have the same height, so the view need not measure them
+        self.fleet_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+        # Hidden views are skipped; switching tabs ticks right away
+        self.ticker.add_listener(
+            lambda now: self.fleet_model.refresh(now) if self.fleet_view.isVisible() else None
+        )
+        return self.fleet_view
+
     def toggle_crane(self, crane_number, button, status_label, timer_label, operator_label):
         if not self.data_manager.is_crane_running(crane_number):
             # Start crane
@@ -191,29 +418,17 @@ class CraneOperationSystem(QMainWindow):
             # Start crane
             self.data_manager.start_crane(crane_number, operator)
             button.setText('Stop')
-            button.setStyleSheet("""
-                QPushButton { 
-                    background-color: red; 
-                    color: white; 
-                    font-weight: bold; 
-                }
-            """)
+            set_running_style(button, True)
             status_label.setText('Running')
             
             # Start timer
             self.start_crane_timer(crane_number, timer_label)
         else:
             # Stop crane - show idle reason dialog
-            result = self.show_idle_reason_dialog(crane_number)
+            result = self.show_idle_reason_dialog([crane_number])
             if result:
                 button.setText('Start')
-                button.setStyleSheet("""
-                    QPushButton { 
-                        background-color: green; 
-                        color: white; 
-                        font-weight: bold; 
-                    }
-                """)
+                set_running_style(button, False)
                 status_label.setText('Stopped')
                 
                 # Stop timer
@@ -221,38 +436,28 @@ class CraneOperationSystem(QMainWindow):
                 timer_label.setText('00:00:00')
 
     def start_crane_timer(self, crane_number, timer_label):
-        def update_timer():
-            elapsed_time = self.data_manager.get_crane_elapsed_time(crane_number)
-            hours, remainder = divmod(elapsed_time.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            timer_label.setText(f'{hours:02d}:{minutes:02d}:{seconds:02d}')
-        
-        # Create and start timer
-        self.crane_timers[crane_number].timeout.connect(lambda: update_timer())
-        self.crane_timers[crane_number].start(1000)  # Update every second
+        self.ticker.watch(('crane', crane_number), timer_label)
 
     def stop_crane_timer(self, crane_number):
-        # Stop and disconnect the timer
-        self.crane_timers[crane_number].stop()
-        try:
-            self.crane_timers[crane_number].timeout.disconnect()
-        except TypeError:
-            pass  # No connections to disconnect
-
-    def show_idle_reason_dialog(self, crane_number):
+        self.ticker.unwatch(('crane', crane_number))
+
+    def show_idle_reason_dialog(self, crane_numbers):
         dialog = QDialog(self)
         dialog.setWindowTitle('Select Idle Reason')
         layout = QVBoxLayout()
         
-        # Use custom searchable combo box
-        idle_dropdown = SearchableComboBox()
+        # Use custom searchable combo box over the registered reasons; the
+        # stored code comes from the label, free text is coded as "Other"
+        idle_reasons = self.data_manager.idle_reasons
+        other = idle_reasons.label_for(OTHER_CODE)
+        idle_dropdown = SearchableComboBox(idle_reasons.choices())
         
         custom_reason = QLineEdit()
-        custom_reason.setPlaceholderText('Enter custom reason if "Other" selected')
+        custom_reason.setPlaceholderText(f'Enter custom reason if "{other}" selected')
         custom_reason.setVisible(False)
         
         idle_dropdown.currentTextChanged.connect(
-            lambda text: custom_reason.setVisible(text == 'Other')
+            lambda text: custom_reason.setVisible(text == other)
         )
         
         layout.addWidget(QLabel('Select Idle Reason:'))
@@ -273,52 +478,66 @@ class CraneOperationSystem(QMainWindow):
         
         if dialog.exec_() == QDialog.Accepted:
             idle_reason = idle_dropdown.currentText()
-            if idle_reason == 'Other':
+            if idle_reason == other:
                 idle_reason = custom_reason.text() or 'Unspecified'
             
-            # Stop both cranes
-            for cn in [1, 2]:
-                result = self.data_manager.stop_crane(cn, idle_reason)
+            # Stop the cranes, committed together
+            submitted_at = perf_counter()
+            self.data_manager.stop_cranes(crane_numbers, idle_reason)
+            for cn in crane_numbers:
+                # Stopping releases the operator for other cranes
+                self.crane_operator_labels[cn].setText('No Operator')
+
+            # Runs on the writer thread once the batch has ended: the rows
+            # are durable in the store's journal (xlsx) or committed
+            # (sqlite). The xlsx workbook itself is only saved later, after
+            # batch_size rows or flush_interval seconds
+            def stop_durable():
+                METRICS.observe('cranelogger_dialog_to_durable_seconds', perf_counter() - submitted_at)
+            self.excel_handler.submit_task(stop_durable)
             
             return True
         return False
 
-    def stop_both_cranes(self):
-        # Reuse the existing idle reason dialog for stopping both cranes
-        result = self.show_idle_reason_dialog(1)  # Passes 1 as a placeholder
+    def stop_all_cranes(self):
+        running = [crane.unit_id for crane, _ in self.data_manager.running_units('crane')]
+        if not running:
+            return
         
-        # Reset UI for both cranes
-        for crane_number in [1, 2]:
+        # Reuse the existing idle reason dialog for stopping every running crane
+        if not self.show_idle_reason_dialog(running):
+            return
+        
+        # Reset UI for the stopped cranes
+        for crane_number in running:
             # Reset button
-            button = self.cranes_tab.findChild(QPushButton, f'crane{crane_number}_start_stop')
+            button = self.crane_buttons.get(crane_number)
             if button:
                 button.setText('Start')
-                button.setStyleSheet("""
-                    QPushButton { 
-                        background-color: green; 
-                        color: white; 
-                        font-weight: bold; 
-                    }
-                """)
+                set_running_style(button, False)
             
             # Reset status
-            status_label = self.cranes_tab.findChild(QLabel, f'crane{crane_number}_status')
+            status_label = self.crane_status_labels.get(crane_number)
             if status_label:
                 status_label.setText('Stopped')
             
             # Reset timer
-            timer_label = self.crane_timer_labels[crane_number]
+            timer_label = self.crane_timer_labels.get(crane_number)
             if timer_label:
                 timer_label.setText('00:00:00')
             
             # Stop timer
             self.stop_crane_timer(crane_number)
 
+    def release_operators_on_shift_change(self, now):
+        # Idle cranes start each shift without an operator
+        for crane_number in self.data_manager.roll_shift(now):
+            operator_label = self.crane_operator_labels.get(crane_number)
+            if operator_label:
+                operator_label.setText('No Operator')
+
     def assign_operator(self, crane_number, operator_label):
-        # Get available operators
-        available_operators = self.data_manager.get_available_operators(self.initial_operators)
-        
-        if not available_operators:
+        if not self.data_manager.roster.available:
             QMessageBox.warning(self, 'No Available Operators', 'All operators have been assigned.')
             return None
 
@@ -326,21 +545,36 @@ class CraneOperationSystem(QMainWindow):
         dialog.setWindowTitle(f'Assign Operator to Crane {crane_number}')
         layout = QVBoxLayout()
         
-        # Operator Dropdown
-        operators = QComboBox()
-        operators.addItems(available_operators)
+        # Search box over the available operators; the roster keeps an
+        # index of name prefixes, so each keystroke is a few dict lookups
+        search = QLineEdit()
+        search.setPlaceholderText('Search operators')
+        operators = QListWidget()
+
+        def show_matches(text):
+            operators.clear()
+            operators.addItems(self.data_manager.search_operators(text))
+            if operators.count():
+                operators.setCurrentRow(0)
+
+        search.textChanged.connect(show_matches)
+        search.returnPressed.connect(dialog.accept)
+        operators.itemDoubleClicked.connect(lambda item: dialog.accept())
+        show_matches('')
         
         submit_btn = QPushButton('Assign')
         submit_btn.clicked.connect(dialog.accept)
         
         layout.addWidget(QLabel(f'Select Operator for Crane {crane_number}:'))
+        layout.addWidget(search)
         layout.addWidget(operators)
         layout.addWidget(submit_btn)
         
         dialog.setLayout(layout)
         
-        if dialog.exec_() == QDialog.Accepted:
-            operator = operators.currentText()
+        if dialog.exec_() == QDialog.Accepted and operators.currentItem():
+            operator = operators.currentItem().text()
+            self.data_manager.assign_operator(crane_number, operator)
             operator_label.setText(operator)
             return operator
         return None
@@ -351,75 +585,141 @@ class CraneOperationSystem(QMainWindow):
         
         # Barge Name/ID
         barge_name = QLineEdit()
+        start_btn = QPushButton('Start Barge')
         
         # Tons Loaded
         tons_loaded = QLineEdit()
         tons_loaded.setPlaceholderText('Enter tons loaded')
         tons_loaded.setValidator(QDoubleValidator())
-        
-        # Start/Stop Time (automatically captured)
-        start_time_label = QLabel(datetime.now().strftime('%H:%M:%S'))
-        stop_time_label = QLabel('Not Stopped')
-        
-        start_btn = QPushButton('Start Barge')
         stop_btn = QPushButton('Stop Barge')
         
         def start_barge():
-            start_time_label.setText(datetime.now().strftime('%H:%M:%S'))
-            start_btn.setEnabled(False)
-            stop_btn.setEnabled(True)
+            if not barge_name.text():
+                QMessageBox.warning(self, 'Error', 'Please enter barge name')
+                return
+            try:
+                self.data_manager.start_job('barge', barge_name.text())
+            except ValueError as e:
+                QMessageBox.warning(self, 'Error', str(e))
+                return
+            barge_name.clear()
+            self.refresh_jobs('barge', self.data_manager.now())
         
         def stop_barge():
-            if not barge_name.text() or not tons_loaded.text():
-                QMessageBox.warning(self, 'Error', 'Please fill Barge Name and Tons Loaded')
+            job_id = self.selected_job('barge')
+            if job_id is None or not tons_loaded.text():
+                QMessageBox.warning(self, 'Error', 'Please select a barge and fill Tons Loaded')
                 return
             
-            stop_time = datetime.now()
-            stop_time_label.setText(stop_time.strftime('%H:%M:%S'))
-            
-            # Log barge data
+            # Log barge data with the time the barge was started
             try:
-                self.excel_handler.log_barge_data(
-                    barge_name.text(), 
-                    datetime.now(),  # start time
-                    stop_time,  # stop time
-                    float(tons_loaded.text())  # tons loaded
-                )
-                QMessageBox.information(self, 'Success', 'Barge data logged successfully')
-                
-                # Reset UI
-                barge_name.clear()
-                tons_loaded.clear()
-                start_time_label.setText(datetime.now().strftime('%H:%M:%S'))
-                stop_time_label.setText('Not Stopped')
-                start_btn.setEnabled(True)
-                stop_btn.setEnabled(False)
+                self.data_manager.finish_job(job_id, float(tons_loaded.text()))
             except ValueError:
                 QMessageBox.warning(self, 'Error', 'Invalid tons loaded. Use a numeric value.')
+                return
+            QMessageBox.information(self, 'Success', 'Barge data logged successfully')
+            
+            # Reset UI
+            tons_loaded.clear()
+            self.refresh_jobs('barge', self.data_manager.now())
         
         start_btn.clicked.connect(start_barge)
         stop_btn.clicked.connect(stop_barge)
-        stop_btn.setEnabled(False)
         
         barge_layout.addRow('Barge Name/ID:', barge_name)
+        barge_layout.addRow(start_btn)
+        self.add_job_rows(barge_layout, 'barge', 'Barges Loading:')
         barge_layout.addRow('Tons Loaded:', tons_loaded)
-        barge_layout.addRow('Start Time:', start_time_label)
-        barge_layout.addRow('Stop Time:', stop_time_label)
-        barge_layout.addRow(start_btn, stop_btn)
+        barge_layout.addRow(stop_btn)
         
         barge_widget.setLayout(barge_layout)
         return barge_widget
 
+    def add_job_rows(self, layout, kind, title):
+        # The open jobs of one kind, a crane picker to link cranes to the
+        # selected job, and the live tonnage rates. Refreshed by the ticker
+        # while the tab is on screen
+        jobs = QListWidget()
+        self.job_lists[kind] = jobs
+        
+        crane_picker = QComboBox()
+        for crane in self.data_manager.fleet.cranes.values():
+            crane_picker.addItem(crane.name, crane.unit_id)
+        link_btn = QPushButton('Link Crane')
+        
+        def link_crane():
+            job_id = self.selected_job(kind)
+            if job_id is None:
+                QMessageBox.warning(self, 'Error', f'Please select a {kind}')
+                return
+            self.data_manager.link_crane_to_job(job_id, crane_picker.currentData())
+            self.refresh_jobs(kind, self.data_manager.now())
+        
+        link_btn.clicked.connect(link_crane)
+        
+        rates = QLabel()
+        self.job_rate_labels[kind] = rates
+        
+        layout.addRow(QLabel(title))
+        layout.addRow(jobs)
+        layout.addRow(crane_picker, link_btn)
+        layout.addRow('Throughput:', rates)
+        
+        self.ticker.add_listener(
+            lambda now: self.refresh_jobs(kind, now) if jobs.isVisible() else None
+        )
+
+    def selected_job(self, kind):
+        item = self.job_lists[kind].currentItem()
+        return item.data(Qt.UserRole) if item else None
+
+    def refresh_jobs(self, kind, now):
+        # Items are updated in place so the selection survives each tick
+        jobs = self.job_lists[kind]
+        tracker = self.data_manager.jobs
+        open_jobs = {job.unit_id: job for job in tracker.open_jobs(kind)}
+        
+        for row in reversed(range(jobs.count())):
+            if jobs.item(row).data(Qt.UserRole) not in open_jobs:
+                jobs.takeItem(row)
+        shown = {jobs.item(row).data(Qt.UserRole): jobs.item(row) for row in range(jobs.count())}
+        
+        for job_id, job in open_jobs.items():
+            linked = tracker.linked_cranes(job)
+            text = (
+                f'{job.name}  started {job.start_time:%H:%M:%S}  '
+                f'cranes {", ".join(map(str, linked)) or "-"}  '
+                f'{job.tons:.1f} t  {job.tons_per_hour(now):.1f} t/h'
+            )
+            item = shown.get(job_id)
+            if item is None:
+                jobs.addItem(text)
+                jobs.item(jobs.count() - 1).setData(Qt.UserRole, job_id)
+            elif item.text() != text:
+                item.setText(text)
+        
+        lines = [
+            f'{self.data_manager.fleet.cranes[crane].name}: {rate:.1f} t/h'
+            for crane, rate in sorted(self.data_manager.job_crane_rates(now).items())
+            if crane in self.data_manager.fleet.cranes
+        ]
+        if kind == 'ship':
+            lines += [
+                f'{ship} hatch {hatch}: {rate:.1f} t/h'
+                for (ship, hatch), rate in sorted(tracker.hatch_rates(now).items())
+            ]
+        self.job_rate_labels[kind].setText('\n'.join(lines) or 'No tonnage reported this shift')
+
     def create_generators_tab(self):
         generator_widget = QWidget()
         generator_layout = QVBoxLayout()
         
-        # Generators with start/stop functionality
-        for i in range(1, 4):
+        # Generators with start/stop functionality, one per fleet entry
+        for generator in self.data_manager.fleet.generators.values():
             generator_box = QFormLayout()
             
             # Generator ID
-            generator_id = QLabel(f'Generator {i}')
+            generator_id = QLabel(generator.name)
             
             # Timer Label
             timer_label = QLabel('00:00:00')
@@ -429,81 +729,15 @@ class CraneOperationSystem(QMainWindow):
             
             # Start/Stop Button
             start_stop_btn = QPushButton('Start')
-            start_stop_btn.setStyleSheet("""
-                QPushButton { 
-                    background-color: green; 
-                    color: white; 
-                    font-weight: bold; 
-                }
-            """)
+            set_running_style(start_stop_btn, False)
             
-            # Timer for this generator
-            generator_timer = QTimer(self)
-            generator_start_time = None
-            
-            def create_generator_toggle_handler(gen_num, btn, status_lbl, timer_lbl, gen_timer):
-                def toggle_generator():
-                    nonlocal generator_start_time
-                    
-                    if btn.text() == 'Start':
-                        # Start generator
-                        generator_start_time = datetime.now()
-                        btn.setText('Stop')
-                        btn.setStyleSheet("""
-                            QPushButton { 
-                                background-color: red; 
-                                color: white; 
-                                font-weight: bold; 
-                            }
-                        """)
-                        status_lbl.setText('Running')
-                        
-                        # Start timer
-                        def update_timer():
-                            if generator_start_time:
-                                elapsed_time = datetime.now() - generator_start_time
-                                hours, remainder = divmod(elapsed_time.seconds, 3600)
-                                minutes, seconds = divmod(remainder, 60)
-                                timer_lbl.setText(f'{hours:02d}:{minutes:02d}:{seconds:02d}')
-                        
-                        gen_timer.timeout.connect(update_timer)
-                        gen_timer.start(1000)  # Update every second
-                    else:
-                        # Stop generator
-                        stop_time = datetime.now()
-                        
-                        # Log generator data
-                        self.excel_handler.log_generator_data(
-                            f'Generator {gen_num}', 
-                            generator_start_time, 
-                            stop_time
-                        )
-                        
-                        btn.setText('Start')
-                        btn.setStyleSheet("""
-                            QPushButton { 
-                                background-color: green; 
-                                color: white; 
-                                font-weight: bold; 
-                            }
-                        """)
-                        status_lbl.setText('Stopped')
-                        timer_lbl.setText('00:00:00')
-                        
-                        # Stop timer
-                        gen_timer.stop()
-                        try:
-                            gen_timer.timeout.disconnect()
-                        except TypeError:
-                            pass
-                        
-                        generator_start_time = None
-                
-                return toggle_generator
+            self.generator_buttons[generator.unit_id] = start_stop_btn
+            self.generator_status_labels[generator.unit_id] = status_label
+            self.generator_timer_labels[generator.unit_id] = timer_label
             
-            # Bind the handler
+            # Bind the handler; state lives in the data manager's engine
             start_stop_btn.clicked.connect(
-                create_generator_toggle_handler(i, start_stop_btn, status_label, timer_label, generator_timer)
+                lambda checked, gen_num=generator.unit_id: self.toggle_generator(gen_num)
             )
             
             generator_box.addRow('Generator:', generator_id)
@@ -514,7 +748,53 @@ class CraneOperationSystem(QMainWindow):
             generator_layout.addLayout(generator_box)
         
         generator_widget.setLayout(generator_layout)
-        return generator_widget
+        
+        # Scrollable so large fleets stay usable
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(generator_widget)
+
+        # Stop All Generators
+        stop_all_button = QPushButton('Stop All Generators')
+        stop_all_button.clicked.connect(self.stop_all_generators)
+
+        generators_tab = QWidget()
+        generators_tab_layout = QVBoxLayout()
+        generators_tab_layout.addWidget(scroll_area)
+        generators_tab_layout.addWidget(stop_all_button)
+        generators_tab.setLayout(generators_tab_layout)
+        return generators_tab
+
+    def toggle_generator(self, generator_id):
+        button = self.generator_buttons[generator_id]
+        status_label = self.generator_status_labels[generator_id]
+        timer_label = self.generator_timer_labels[generator_id]
+
+        if not self.data_manager.is_generator_running(generator_id):
+            self.data_manager.start_generator(generator_id)
+            button.setText('Stop')
+            set_running_style(button, True)
+            status_label.setText('Running')
+            self.ticker.watch(('generator', generator_id), timer_label)
+        else:
+            # Stop generator and log its run
+            self.data_manager.stop_generator(generator_id)
+            self.show_generator_stopped(generator_id)
+
+    def show_generator_stopped(self, generator_id):
+        button = self.generator_buttons[generator_id]
+        button.setText('Start')
+        set_running_style(button, False)
+        self.generator_status_labels[generator_id].setText('Stopped')
+        self.generator_timer_labels[generator_id].setText('00:00:00')
+        self.ticker.unwatch(('generator', generator_id))
+
+    def stop_all_generators(self):
+        running = [generator.unit_id for generator, _ in self.data_manager.running_units('generator')]
+        # One stop time and one storage batch for all of them
+        self.data_manager.stop_generators(running)
+        for generator_id in running:
+            self.show_generator_stopped(generator_id)
 
     def create_ships_tab(self):
         ships_widget = QWidget()
@@ -523,72 +803,81 @@ class CraneOperationSystem(QMainWindow):
         # Ship Name
         ship_name = QLineEdit()
         
-        # Quantity to Load/Unload
-        quantity = QLineEdit()
-        quantity.setPlaceholderText('Enter quantity')
-        
         # Number of Hatches
         hatches = QLineEdit()
         hatches.setPlaceholderText('Number of hatches')
+        start_btn = QPushButton('Start Ship')
         
-        # Start/Finished Ship Buttons
-        start_time_label = QLabel('Not Started')
-        finished_time_label = QLabel('Not Finished')
+        # Progress per hatch while the ship is worked
+        hatch = QLineEdit()
+        hatch.setPlaceholderText('Hatch')
+        hatch_tons = QLineEdit()
+        hatch_tons.setPlaceholderText('Tons')
+        hatch_tons.setValidator(QDoubleValidator())
+        record_btn = QPushButton('Record Hatch Tons')
         
-        start_btn = QPushButton('Start Ship')
+        # Quantity Loaded/Unloaded in total
+        quantity = QLineEdit()
+        quantity.setPlaceholderText('Enter quantity')
         finished_btn = QPushButton('Finish Ship')
-        finished_btn.setEnabled(False)
         
         def start_ship():
-            if not ship_name.text():
-                QMessageBox.warning(self, 'Error', 'Please enter ship name')
+            if not ship_name.text() or not hatches.text():
+                QMessageBox.warning(self, 'Error', 'Please enter ship name and hatches')
                 return
-            
-            start_time = datetime.now()
-            start_time_label.setText(start_time.strftime('%H:%M:%S'))
-            start_btn.setEnabled(False)
-            finished_btn.setEnabled(True)
+            try:
+                self.data_manager.start_job('ship', ship_name.text(), int(hatches.text()))
+            except ValueError as e:
+                QMessageBox.warning(self, 'Error', str(e))
+                return
+            ship_name.clear()
+            hatches.clear()
+            self.refresh_jobs('ship', self.data_manager.now())
+        
+        def record_hatch_tons():
+            job_id = self.selected_job('ship')
+            if job_id is None or not hatch.text() or not hatch_tons.text():
+                QMessageBox.warning(self, 'Error', 'Please select a ship and fill hatch and tons')
+                return
+            try:
+                self.data_manager.add_job_tons(job_id, float(hatch_tons.text()), int(hatch.text()))
+            except ValueError:
+                QMessageBox.warning(self, 'Error', 'Invalid hatch or tons. Use numeric values.')
+                return
+            hatch_tons.clear()
+            self.refresh_jobs('ship', self.data_manager.now())
         
         def finish_ship():
-            if not ship_name.text() or not quantity.text() or not hatches.text():
-                QMessageBox.warning(self, 'Error', 'Please fill all fields')
+            job_id = self.selected_job('ship')
+            if job_id is None:
+                QMessageBox.warning(self, 'Error', 'Please select a ship')
                 return
             
-            finished_time = datetime.now()
-            finished_time_label.setText(finished_time.strftime('%H:%M:%S'))
-            
+            # Quantity may be left empty when hatch tons were recorded
             try:
-                # Log ship data
-                self.excel_handler.log_ship_data(
-                    ship_name.text(), 
-                    datetime.now(),  # start time 
-                    finished_time,  # finished time
-                    float(quantity.text()),  # quantity
-                    int(hatches.text())  # hatches
-                )
-                
-                QMessageBox.information(self, 'Success', 'Ship data logged successfully')
-                
-                # Reset UI
-                ship_name.clear()
-                quantity.clear()
-                hatches.clear()
-                start_time_label.setText('Not Started')
-                finished_time_label.setText('Not Finished')
-                start_btn.setEnabled(True)
-                finished_btn.setEnabled(False)
+                total = float(quantity.text()) if quantity.text() else None
+                self.data_manager.finish_job(job_id, total)
             except ValueError:
-                QMessageBox.warning(self, 'Error', 'Invalid quantity or hatches. Use numeric values.')
+                QMessageBox.warning(self, 'Error', 'Invalid quantity. Use a numeric value.')
+                return
+            QMessageBox.information(self, 'Success', 'Ship data logged successfully')
+            
+            # Reset UI
+            quantity.clear()
+            self.refresh_jobs('ship', self.data_manager.now())
         
         start_btn.clicked.connect(start_ship)
+        record_btn.clicked.connect(record_hatch_tons)
         finished_btn.clicked.connect(finish_ship)
         
         ships_layout.addRow('Ship Name:', ship_name)
-        ships_layout.addRow('Quantity:', quantity)
         ships_layout.addRow('Number of Hatches:', hatches)
-        ships_layout.addRow('Start Time:', start_time_label)
-        ships_layout.addRow('Finished Time:', finished_time_label)
-        ships_layout.addRow(start_btn, finished_btn)
+        ships_layout.addRow(start_btn)
+        self.add_job_rows(ships_layout, 'ship', 'Ships Working:')
+        ships_layout.addRow(hatch, hatch_tons)
+        ships_layout.addRow(record_btn)
+        ships_layout.addRow('Quantity:', quantity)
+        ships_layout.addRow(finished_btn)
         
         ships_widget.setLayout(ships_layout)
         return ships_widget
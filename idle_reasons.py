@@ -0,0 +1,71 @@
+import json
+import os
+
+# Rows written before codes existed, or with no idle reason
+UNCODED = 0
+# Free-text reasons entered through "Other" share one code
+OTHER_CODE = 99
+
+# Used when no idle reasons file is present. Categories are paths, parent
+# first, so reports can roll up to any level
+DEFAULT_IDLE_REASONS = {
+    'reasons': [
+        {'code': 1, 'label': 'Maintenance', 'category': 'Equipment/Planned'},
+        {'code': 2, 'label': 'Operator Break', 'category': 'Labour'},
+        {'code': 3, 'label': 'Equipment Issue', 'category': 'Equipment/Unplanned'},
+        {'code': 4, 'label': 'Material Shortage', 'category': 'Logistics'},
+        {'code': 5, 'label': 'Mechanical Failure', 'category': 'Equipment/Unplanned'},
+        {'code': 6, 'label': 'Weather Conditions', 'category': 'External'},
+        {'code': 7, 'label': 'Waiting for Cargo', 'category': 'Logistics'},
+        {'code': 8, 'label': 'Shift Change', 'category': 'Labour'},
+        {'code': OTHER_CODE, 'label': 'Other', 'category': 'Other'}
+    ]
+}
+
+class IdleReasonRegistry:
+    # Stable integer codes for idle reasons. Labels map to codes with one
+    # dict lookup; a label that is not registered (custom "Other" text) gets
+    # OTHER_CODE. Codes never change meaning, so they can be grouped across
+    # years of rows even when labels are renamed
+    def __init__(self, config):
+        self.labels = {}       # code -> label
+        self.codes = {}        # label -> code
+        self.categories = {}   # code -> ('Equipment', 'Unplanned')
+        for reason in config['reasons']:
+            code = int(reason['code'])
+            if code <= UNCODED or code in self.labels:
+                raise ValueError(f'Idle reason code {code} must be positive and unique')
+            self.labels[code] = reason['label']
+            self.codes[reason['label']] = code
+            self.categories[code] = tuple(reason.get('category', 'Other').split('/'))
+            # Older labels still resolve to the code after a rename
+            for alias in reason.get('aliases', []):
+                self.codes[alias] = code
+        self.labels.setdefault(OTHER_CODE, 'Other')
+        self.categories.setdefault(OTHER_CODE, ('Other',))
+
+    @classmethod
+    def load(cls, filename='idle_reasons.json'):
+        if not os.path.exists(filename):
+            return cls(DEFAULT_IDLE_REASONS)
+        with open(filename, encoding='utf-8') as config:
+            return cls(json.load(config))
+
+    def choices(self):
+        # Labels in code order for the idle reason dialog, "Other" last
+        return [self.labels[code] for code in sorted(self.labels, key=lambda code: (code == OTHER_CODE, code))]
+
+    def code_for(self, label):
+        if label is None:
+            return None
+        return self.codes.get(label, OTHER_CODE)
+
+    def label_for(self, code):
+        return self.labels.get(code, 'Uncoded')
+
+    def category_for(self, code, level=None):
+        # The category path, cut to its first `level` parts
+        path = self.categories.get(code, ('Uncoded',))
+        return '/'.join(path[:level] if level else path)
+
+__all__ = ['IdleReasonRegistry', 'DEFAULT_IDLE_REASONS', 'UNCODED', 'OTHER_CODE']
\ No newline at end of file
@@ -0,0 +1,175 @@
+import csv
+from datetime import date, datetime, timedelta
+import json
+
+# Event type -> (sheet, row builder on ExcelHandler, fields it takes)
+EVENT_TYPES = {
+    'crane': ('Crane Data', 'crane_rows', 
+              ['crane_number', 'operator', 'start_time', 'stop_time', 'idle_reason']),
+    'barge': ('Barge Data', 'barge_row', 
+              ['barge_name', 'start_time', 'stop_time', 'tons_loaded', 'cranes']),
+    'generator': ('Generator Data', 'generator_rows', 
+                  ['generator_id', 'start_time', 'stop_time']),
+    'ship': ('Ship Data', 'ship_row', 
+             ['ship_name', 'start_time', 'finished_time', 'quantity', 'hatches', 'cranes'])
+}
+
+REQUIRED_FIELDS = {
+    'crane': ['crane_number', 'operator', 'start_time', 'stop_time'],
+    'barge': ['barge_name', 'start_time', 'stop_time', 'tons_loaded'],
+    'generator': ['generator_id', 'start_time', 'stop_time'],
+    'ship': ['ship_name']
+}
+
+DATETIME_FIELDS = {'start_time', 'stop_time', 'finished_time'}
+
+class IngestError(ValueError):
+    def __init__(self, line_number, message):
+        super().__init__(f'line {line_number}: {message}')
+        self.line_number = line_number
+
+class IngestResult:
+    def __init__(self):
+        self.written = {}
+        self.errors = []
+        # sheet -> earliest row date written, to reopen archived days
+        self.first_dates = {}
+
+    @property
+    def total_written(self):
+        return sum(self.written.values())
+
+def read_events(filename, file_format=None):
+    # Yields (line number, event dict) from a CSV or JSONL file. A JSONL line
+    # that does not parse is yielded as an IngestError in place of the event
+    file_format = file_format or ('csv' if filename.lower().endswith('.csv') else 'jsonl')
+    with open(filename, encoding='utf-8', newline='') as events:
+        if file_format == 'csv':
+            for line_number, event in enumerate(csv.DictReader(events), start=2):
+                yield line_number, {key: value for key, value in event.items() if value not in ('', None)}
+        else:
+            for line_number, line in enumerate(events, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, IngestError(line_number, f'invalid JSON: {e}')
+
+def parse_datetime(value):
+    # Rows, shifts and durations are all in naive local time
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if value.tzinfo is not None:
+        raise ValueError(f'{value.isoformat()} has a UTC offset; times must be local without one')
+    return value
+
+def validate_event(event, line_number, crane_numbers=None, max_duration=timedelta(hours=24), 
+                   shift_calendar=None):
+    # Returns (sheet name, builder name, builder kwargs) or raises IngestError
+    if not isinstance(event, dict):
+        raise IngestError(line_number, 'event must be a JSON object')
+    event_type = event.get('type')
+    if event_type not in EVENT_TYPES:
+        raise IngestError(line_number, f"unknown event type '{event_type}'")
+    sheet_name, builder, fields = EVENT_TYPES[event_type]
+
+    missing = [field for field in REQUIRED_FIELDS[event_type] if event.get(field) is None]
+    if missing:
+        raise IngestError(line_number, f"missing {', '.join(missing)}")
+
+    values = {field: event.get(field) for field in fields}
+    try:
+        for field in DATETIME_FIELDS.intersection(fields):
+            if values[field] is not None:
+                values[field] = parse_datetime(values[field])
+        if event_type == 'crane':
+            values['crane_number'] = int(values['crane_number'])
+        if event_type == 'barge':
+            values['tons_loaded'] = float(values['tons_loaded'])
+        if event_type == 'ship':
+            if values['quantity'] is not None:
+                values['quantity'] = float(values['quantity'])
+            if values['hatches'] is not None:
+                values['hatches'] = int(values['hatches'])
+    except (TypeError, ValueError) as e:
+        raise IngestError(line_number, str(e)) from None
+
+    if event_type == 'crane':
+        if crane_numbers is not None and values['crane_number'] not in crane_numbers:
+            raise IngestError(line_number, f"unknown crane number {values['crane_number']}")
+        # An explicit shift must agree with the one log_crane_data would write
+        shift = event.get('shift')
+        if (shift is not None and shift_calendar is not None and 
+                shift != shift_calendar.shift_name(values['start_time'])):
+            raise IngestError(
+                line_number, f"shift '{shift}' does not match start time {values['start_time']:%H:%M:%S}"
+            )
+
+    start_time = values.get('start_time')
+    stop_time = values.get('stop_time') or values.get('finished_time')
+    if start_time is not None and stop_time is not None:
+        duration = stop_time - start_time
+        if duration < timedelta():
+            raise IngestError(line_number, 'stop time is before start time')
+        if max_duration is not None and duration > max_duration:
+            raise IngestError(line_number, f'duration {duration} exceeds {max_duration}')
+
+    # Backfilled rows are dated by the event, not the day of the import.
+    # Crane and generator rows are dated by the times they cover
+    if not builder.endswith('_rows'):
+        if event.get('date') is not None:
+            values['logged_on'] = date.fromisoformat(str(event['date']))
+        elif stop_time is not None or start_time is not None:
+            values['logged_on'] = (stop_time or start_time).date()
+
+    return sheet_name, builder, values
+
+def ingest_events(excel_handler, events, crane_numbers=None, chunk_size=10000, 
+                  max_duration=timedelta(hours=24)):
+    # Validates (line number, event) pairs and writes them in large chunks.
+    # Invalid events are collected in the result instead of stopping the run
+    result = IngestResult()
+    chunk = []
+
+    def write_chunk():
+        excel_handler.append_rows(chunk)
+        for sheet_name, row in chunk:
+            result.written[sheet_name] = result.written.get(sheet_name, 0) + 1
+            first = result.first_dates.get(sheet_name)
+            if first is None or row[0] < first:
+                result.first_dates[sheet_name] = row[0]
+        chunk.clear()
+
+    with excel_handler.batch():
+        for line_number, event in events:
+            if isinstance(event, IngestError):
+                result.errors.append(event)
+                continue
+            try:
+                sheet_name, builder, values = validate_event(
+                    event, line_number, crane_numbers, max_duration, excel_handler.shift_calendar
+                )
+            except IngestError as e:
+                result.errors.append(e)
+                continue
+            built = getattr(excel_handler, builder)(**values)
+            # *_rows builders cut a run into several rows
+            rows = built if builder.endswith('_rows') else [built]
+            chunk.extend((sheet_name, row) for row in rows)
+            if len(chunk) >= chunk_size:
+                write_chunk()
+        if chunk:
+            write_chunk()
+    excel_handler.flush()
+
+    return result
+
+def ingest_file(excel_handler, filename, file_format=None, fleet=None, **options):
+    crane_numbers = set(fleet.cranes) if fleet is not None else None
+    return ingest_events(excel_handler, read_events(filename, file_format), crane_numbers, **options)
+
+__all__ = [
+    'EVENT_TYPES', 'IngestError', 'IngestResult', 
+    'read_events', 'validate_event', 'ingest_events', 'ingest_file'
+]
\ No newline at end of file
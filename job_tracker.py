@@ -0,0 +1,181 @@
+from collections import defaultdict
+from datetime import datetime
+
+class Job:
+    # A barge being loaded or a ship being worked. kind and unit_id let it
+    # go through DataManager.record_event like any unit
+    __slots__ = ('kind', 'unit_id', 'name', 'start_time', 'hatches', 'cranes',
+                 'crane_seconds', 'tons', 'hatch_tons')
+
+    def __init__(self, kind, job_id, name, start_time, hatches=None):
+        self.kind = kind
+        self.unit_id = job_id
+        self.name = name
+        self.start_time = start_time
+        self.hatches = hatches
+        self.cranes = set()                    # every crane that served it
+        self.crane_seconds = defaultdict(float)  # crane -> seconds worked on it
+        self.tons = 0.0
+        self.hatch_tons = defaultdict(float)     # hatch -> tons
+
+    def tons_per_hour(self, now):
+        hours = (now - self.start_time).total_seconds() / 3600
+        return self.tons / hours if hours > 0 else 0.0
+
+class JobTracker:
+    # Open barge and ship jobs, any number at a time, indexed by id, by
+    # (kind, name) and by the crane serving each. A crane run that stops
+    # while the crane is linked to a job counts towards that job, and tons
+    # reported on a job are shared out over its cranes by the time each
+    # worked on it, runs still open included. The per-crane and per-hatch
+    # tonnage rates are kept as running sums for the current shift, so
+    # reading them is a division
+    def __init__(self):
+        self.jobs = {}
+        self.by_name = {}
+        self.by_crane = {}
+        self.next_id = 1
+        self.crane_tons = defaultdict(float)
+        self.crane_seconds = defaultdict(float)
+
+    def open_jobs(self, kind=None):
+        return [job for job in self.jobs.values() if kind is None or job.kind == kind]
+
+    def get(self, job_id):
+        try:
+            return self.jobs[job_id]
+        except KeyError:
+            raise ValueError('Invalid job id') from None
+
+    def start(self, kind, name, start_time, hatches=None, job_id=None):
+        if (kind, name) in self.by_name:
+            raise ValueError(f'{kind.title()} {name} is already in progress')
+        job_id = job_id or self.next_id
+        self.next_id = max(self.next_id, job_id + 1)
+        job = Job(kind, job_id, name, start_time, hatches)
+        self.jobs[job_id] = job
+        self.by_name[(kind, name)] = job
+        return job
+
+    def link_crane(self, job, crane_number):
+        # A crane serves one job at a time; linking moves it
+        self.by_crane[crane_number] = job
+        job.cranes.add(crane_number)
+
+    def unlink_crane(self, crane_number):
+        return self.by_crane.pop(crane_number, None)
+
+    def job_for_crane(self, crane_number):
+        return self.by_crane.get(crane_number)
+
+    def linked_cranes(self, job):
+        return sorted(crane for crane, served in self.by_crane.items() if served is job)
+
+    def add_crane_run(self, crane_number, start_time, stop_time):
+        # Only the part of the run after the job started is counted
+        job = self.by_crane.get(crane_number)
+        if job is None:
+            return None
+        seconds = (stop_time - max(start_time, job.start_time)).total_seconds()
+        if seconds > 0:
+            job.crane_seconds[crane_number] += seconds
+            self.crane_seconds[crane_number] += seconds
+        return job
+
+    def add_tons(self, job, tons, hatch=None, running=None):
+        # running: crane -> seconds of its still-open run on this job, so
+        # tons reported mid-run go to the cranes doing the work
+        job.tons += tons
+        if hatch is not None:
+            job.hatch_tons[hatch] += tons
+        worked = defaultdict(float, job.crane_seconds)
+        for crane_number, seconds in (running or {}).items():
+            worked[crane_number] += seconds
+        total = sum(worked.values())
+        if total:
+            for crane_number, seconds in worked.items():
+                self.crane_tons[crane_number] += tons * seconds / total
+
+    def finish(self, job, tons=None, running=None):
+        # tons is the job's final total; whatever was not reported yet is
+        # added now. Returns the cranes that served it
+        if tons is not None and tons > job.tons:
+            self.add_tons(job, tons - job.tons, running=running)
+        # Open runs stop counting towards the job here; their time so far
+        # is booked now, as it would have been had the cranes stopped
+        for crane_number, seconds in (running or {}).items():
+            job.crane_seconds[crane_number] += seconds
+            self.crane_seconds[crane_number] += seconds
+        del self.jobs[job.unit_id]
+        del self.by_name[(job.kind, job.name)]
+        for crane_number in [crane for crane, served in self.by_crane.items() if served is job]:
+            del self.by_crane[crane_number]
+        return sorted(job.cranes)
+
+    def start_shift(self):
+        self.crane_tons.clear()
+        self.crane_seconds.clear()
+
+    def crane_rates(self, running=None):
+        # crane -> tons per hour of job time this shift; running adds the
+        # open runs, as in add_tons
+        worked = defaultdict(float, self.crane_seconds)
+        for crane_number, seconds in (running or {}).items():
+            worked[crane_number] += seconds
+        return {
+            crane_number: self.crane_tons[crane_number] / seconds * 3600
+            for crane_number, seconds in worked.items() if seconds
+        }
+
+    def hatch_rates(self, now):
+        # (ship, hatch) -> tons per hour since the ship started
+        rates = {}
+        for job in self.jobs.values():
+            hours = (now - job.start_time).total_seconds() / 3600
+            if hours <= 0:
+                continue
+            for hatch, tons in job.hatch_tons.items():
+                rates[(job.name, hatch)] = tons / hours
+        return rates
+
+    def snapshot(self):
+        # JSON-friendly: int keys become pairs
+        return {
+            'next_id': self.next_id,
+            'jobs': [
+                {
+                    'kind': job.kind,
+                    'id': job.unit_id,
+                    'name': job.name,
+                    'start_time': job.start_time,
+                    'hatches': job.hatches,
+                    'cranes': sorted(job.cranes),
+                    'linked': self.linked_cranes(job),
+                    'crane_seconds': sorted(job.crane_seconds.items()),
+                    'tons': job.tons,
+                    'hatch_tons': sorted(job.hatch_tons.items())
+                }
+                for job in self.jobs.values()
+            ],
+            'crane_tons': sorted(self.crane_tons.items()),
+            'crane_seconds': sorted(self.crane_seconds.items())
+        }
+
+    def restore(self, state):
+        # Into an empty tracker, from snapshot()
+        self.next_id = state['next_id']
+        for entry in state['jobs']:
+            job = self.start(
+                entry['kind'], entry['name'], datetime.fromisoformat(entry['start_time']),
+                entry['hatches'], entry['id']
+            )
+            job.cranes.update(entry['cranes'])
+            for crane_number in entry['linked']:
+                self.by_crane[crane_number] = job
+            job.crane_seconds.update(entry['crane_seconds'])
+            job.tons = entry['tons']
+            job.hatch_tons.update(entry['hatch_tons'])
+        self.crane_tons.update(state['crane_tons'])
+        self.crane_seconds.update(state['crane_seconds'])
+
+__all__ = ['Job', 'JobTracker']
\ No newline at end of file
@@ -0,0 +1,161 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import json
+import os
+import socket
+
+from storage import decode_row, open_store, parse_address
+
+# Largest request line accepted. Clients split batches into bounded chunks,
+# but a chunk of wide rows is still well past asyncio's 64 KiB default
+REQUEST_LIMIT = 16 * 1024 * 1024
+
+def take(iterator, count):
+    chunk = []
+    for row in iterator:
+        chunk.append(row)
+        if len(chunk) >= count:
+            break
+    return chunk
+
+class LogDaemon:
+    # Owns the store for every terminal. Writes from all connections go
+    # through one queue; the writer drains whatever has arrived and applies
+    # it as a single batch on a dedicated thread, so concurrent terminals
+    # share commits instead of overwriting each other
+    def __init__(self, store, flush_check_interval=1.0, read_chunk=1000):
+        self.store = store
+        self.flush_check_interval = flush_check_interval
+        self.read_chunk = read_chunk
+        self.write_pool = ThreadPoolExecutor(max_workers=1)
+        self.writes = None
+
+    async def serve(self, address):
+        self.writes = asyncio.Queue()
+        family, location = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(location):
+                os.remove(location)
+            server = await asyncio.start_unix_server(
+                self.handle_client, location, limit=REQUEST_LIMIT
+            )
+        else:
+            server = await asyncio.start_server(self.handle_client, *location, limit=REQUEST_LIMIT)
+
+        writer_task = asyncio.create_task(self.write_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            await asyncio.get_running_loop().run_in_executor(self.write_pool, self.store.close)
+
+    async def write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                item = await asyncio.wait_for(self.writes.get(), self.flush_check_interval)
+            except asyncio.TimeoutError:
+                # A failed timed flush is retried on the next tick or write;
+                # it must not take the writer down with it
+                try:
+                    await loop.run_in_executor(self.write_pool, self.store.flush_if_due)
+                except Exception:
+                    pass
+                continue
+
+            batch = [item]
+            while not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+
+            try:
+                errors = await loop.run_in_executor(self.write_pool, self.apply, batch)
+            except Exception as e:
+                # The batch itself failed (e.g. its commit on exit); every
+                # waiting client gets the error instead of hanging
+                errors = [str(e)] * len(batch)
+            for (_, done), error in zip(batch, errors):
+                if not done.cancelled():
+                    done.set_result(error)
+
+    def apply(self, batch):
+        # Runs on the writer thread; one store batch for everything drained
+        errors = []
+        with self.store.batch():
+            for rows, _ in batch:
+                try:
+                    if rows is None:
+                        self.store.flush()
+                    else:
+                        self.store.append_many(
+                            [(record['sheet'], decode_row(record['row'])) for record in rows]
+                        )
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(str(e))
+        return errors
+
+    async def submit(self, rows):
+        done = asyncio.get_running_loop().create_future()
+        await self.writes.put((rows, done))
+        return await done
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                op = request['op']
+                if op == 'append':
+                    error = await self.submit(request['rows'])
+                    self.respond(writer, {'ok': error is None, 'error': error})
+                elif op == 'flush':
+                    error = await self.submit(None)
+                    self.respond(writer, {'ok': error is None, 'error': error})
+                elif op == 'rows':
+                    await self.send_rows(writer, request)
+                else:
+                    self.respond(writer, {'ok': False, 'error': f"Unknown op '{op}'"})
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, writer, payload):
+        writer.write((json.dumps(payload, default=str) + '\n').encode('utf-8'))
+
+    async def send_rows(self, writer, request):
+        # Stream in chunks from a thread of its own; a reader never blocks
+        # the writer and never materialises the whole sheet
+        loop = asyncio.get_running_loop()
+        start_date = date.fromisoformat(request['start_date']) if request.get('start_date') else None
+        end_date = date.fromisoformat(request['end_date']) if request.get('end_date') else None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            try:
+                rows = await loop.run_in_executor(
+                    pool, self.store.iter_rows, request['sheet'], start_date, end_date
+                )
+                while True:
+                    chunk = await loop.run_in_executor(pool, take, rows, self.read_chunk)
+                    if not chunk:
+                        break
+                    for row in chunk:
+                        self.respond(writer, {'ok': True, 'row': row})
+                    await writer.drain()
+            except Exception as e:
+                self.respond(writer, {'ok': False, 'error': str(e)})
+                return
+        self.respond(writer, {'ok': True})
+
+def run_daemon(address='127.0.0.1:8765', backend='sqlite', filename=None):
+    daemon = LogDaemon(open_store(backend, filename))
+    try:
+        asyncio.run(daemon.serve(address))
+    except KeyboardInterrupt:
+        pass
+
+__all__ = ['LogDaemon', 'run_daemon', 'REQUEST_LIMIT']
\ No newline at end of file
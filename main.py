@@ -1,12 +1,298 @@
+import time
+
+# Cold start is measured from here to the first painted frame
+STARTED_AT = time.perf_counter()
+
 import sys
-from PyQt5.QtWidgets import QApplication
-from gui import CraneOperationSystem
+import os
+import argparse
+from datetime import date
+
+# Seconds allowed from launch to the first painted frame
+STARTUP_BUDGET = float(os.environ.get('CRANELOGGER_STARTUP_BUDGET', '1.5'))
+# Modules that must not be imported before the first frame
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'pyarrow', 'analytics', 'archive')
+
+def report_startup(app):
+    elapsed = time.perf_counter() - STARTED_AT
+    heavy = sorted(name for name in HEAVY_MODULES if name in sys.modules)
+    if elapsed > STARTUP_BUDGET or heavy or os.environ.get('CRANELOGGER_STARTUP_EXIT'):
+        print(f'Startup took {elapsed:.3f} s (budget {STARTUP_BUDGET:.3f} s)', file=sys.stderr)
+    if heavy:
+        print(f'Imported before first paint: {", ".join(heavy)}', file=sys.stderr)
+    if os.environ.get('CRANELOGGER_STARTUP_EXIT'):
+        # Used by the startup-report subcommand to time a launch
+        app.exit(1 if elapsed > STARTUP_BUDGET or heavy else 0)
+
+def start_metrics(app, dispatch):
+    # CRANELOGGER_METRICS_ADDRESS serves /metrics on host:port and
+    # CRANELOGGER_METRICS_FILE receives the histograms when the app exits
+    address = os.environ.get('CRANELOGGER_METRICS_ADDRESS')
+    dump_filename = os.environ.get('CRANELOGGER_METRICS_FILE')
+    if not address and not dump_filename:
+        return
+
+    from metrics import METRICS, serve_metrics
+
+    if address:
+        serve_metrics(address, dispatch=dispatch)
+    if dump_filename:
+        app.aboutToQuit.connect(lambda: METRICS.dump(dump_filename))
+
+def run_gui():
+    from PyQt5.QtWidgets import QApplication
+    from gui import CraneOperationSystem
 
-def main():
     app = QApplication(sys.argv)
     crane_system = CraneOperationSystem()
+    # Flush queued rows to disk before the process exits
+    app.aboutToQuit.connect(crane_system.flush_storage)
+    start_metrics(app, crane_system.writer_signals.gui_call_requested.emit)
+    crane_system.first_painted.connect(lambda: report_startup(app))
     crane_system.show()
     sys.exit(app.exec_())
 
+def parse_import_times(output):
+    # Lines of python -X importtime: "import time: self | cumulative | name"
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        imports.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(imports, reverse=True)
+
+def run_startup_report(args):
+    import subprocess
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import gui'], 
+        capture_output=True, text=True
+    )
+    if result.returncode:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(result.returncode)
+
+    imports = parse_import_times(result.stderr)
+    print(f'{"cumulative ms":>14} {"self ms":>9}  module')
+    for cumulative_us, self_us, name in imports[:args.top]:
+        print(f'{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}')
+    heavy = sorted({name.split('.')[0] for _, _, name in imports} & set(HEAVY_MODULES))
+    if heavy:
+        print(f'Imported by the GUI: {", ".join(heavy)}')
+
+    if args.launch:
+        # Time a real launch up to the first painted frame
+        env = dict(os.environ, CRANELOGGER_STARTUP_EXIT='1')
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        launch = subprocess.run([sys.executable, os.path.abspath(__file__)], env=env)
+        sys.exit(launch.returncode)
+
+def run_export(args):
+    from excel_handler import ExcelHandler
+
+    excel_handler = ExcelHandler(args.source, backend=args.backend)
+    excel_handler.export_xlsx(args.output, args.start_date, args.end_date)
+    excel_handler.close()
+
+def run_downtime(args):
+    from excel_handler import ExcelHandler
+    from analytics import load_crane_frame, downtime_pareto, downtime_trend
+
+    excel_handler = ExcelHandler(args.source, backend=args.backend)
+    frame = load_crane_frame(excel_handler, args.start_date, args.end_date)
+    excel_handler.close()
+
+    if args.trend:
+        report = downtime_trend(frame, excel_handler.idle_reasons, args.trend, args.level or None)
+        print(report.round(2).to_string())
+    else:
+        report = downtime_pareto(frame, excel_handler.idle_reasons, args.level or None)
+        print(report.round(3).to_string(index=False))
+
+def run_compact(args):
+    from excel_handler import ExcelHandler
+    from archive import ShiftArchive
+    from data_manager import DataManager
+    from event_journal import EventJournal
+    from storage import XlsxStore
+
+    excel_handler = ExcelHandler(args.source, backend=args.backend)
+    # Days with a run still in progress stay open until it stops
+    data_manager = DataManager(excel_handler, load_history=False)
+    data_manager.replay(*EventJournal(args.journal).read())
+    open_since = min(
+        (unit.start_time.date() for unit, _ in data_manager.running_units()), default=None
+    )
+    archived_rows = ShiftArchive(args.archive).compact(excel_handler, open_since=open_since)
+    excel_handler.close()
+    for sheet_name, count in archived_rows.items():
+        print(f'{sheet_name}: {count} rows archived')
+    if isinstance(excel_handler.store, XlsxStore):
+        print('Reports that reach unarchived days still read the whole workbook; '
+              'the sqlite or partitioned backend reads only the tail', file=sys.stderr)
+
+def run_archive_partitions(args):
+    from datetime import timedelta
+    from storage import PartitionedXlsxStore
+
+    # The running app may be writing to the directory; its journals are its own
+    store = PartitionedXlsxStore(args.source, recover=False)
+    archived = store.archive_partitions(date.today() - timedelta(days=args.keep_days))
+    store.close()
+    for name in archived:
+        print(f'{name} archived')
+
+def run_log_daemon(args):
+    from log_daemon import run_daemon
+
+    run_daemon(args.listen, args.backend, args.source)
+
+def run_ingest(args):
+    from excel_handler import ExcelHandler
+    from data_manager import Fleet
+    from ingest import ingest_file
+
+    excel_handler = ExcelHandler(args.source, backend=args.backend)
+    result = ingest_file(excel_handler, args.events, args.format, Fleet.load(args.fleet))
+    excel_handler.close()
+
+    for sheet_name, count in result.written.items():
+        print(f'{sheet_name}: {count} rows written')
+    if os.path.exists(args.archive):
+        # Backfilled days that were already archived are rebuilt by the
+        # next compact
+        from archive import ShiftArchive
+
+        archive = ShiftArchive(args.archive)
+        for sheet_name, first_date in result.first_dates.items():
+            if archive.reopen(sheet_name, first_date):
+                print(f'{sheet_name}: archive reopened from {first_date:%Y-%m}')
+    for error in result.errors[:20]:
+        print(f'Skipped {error}', file=sys.stderr)
+    if len(result.errors) > 20:
+        print(f'... {len(result.errors) - 20} more invalid events skipped', file=sys.stderr)
+    if result.errors:
+        sys.exit(1)
+
+def run_benchmark(args):
+    import json
+    from benchmark import run_benchmarks, print_results
+
+    report = run_benchmarks(
+        cases=args.cases, backend=args.backend, sizes=args.sizes, calls=args.calls, 
+        cycles=args.cycles, rounds=args.rounds, 
+        progress=lambda case, params: print(f'Running {case} {params}', file=sys.stderr)
+    )
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as previous:
+            baseline = json.load(previous)
+    print_results(report, baseline)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Crane Operation Management System', 
+        epilog='Run without arguments to start the operator GUI.'
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    export_parser = subparsers.add_parser('export', help='Export history to an xlsx report')
+    export_parser.add_argument('output', help='Workbook to write')
+    export_parser.add_argument('--source', help='Store to read from (defaults to the backend default)')
+    export_parser.add_argument('--backend', choices=['xlsx', 'partitioned', 'sqlite', 'daemon'])
+    export_parser.add_argument('--from', dest='start_date', type=date.fromisoformat, 
+                               help='First date to include (YYYY-MM-DD)')
+    export_parser.add_argument('--to', dest='end_date', type=date.fromisoformat, 
+                               help='Last date to include (YYYY-MM-DD)')
+
+    downtime_parser = subparsers.add_parser('downtime', help='Idle time Pareto or trend by reason code')
+    downtime_parser.add_argument('--source', help='Store to read from (defaults to the backend default)')
+    downtime_parser.add_argument('--backend', choices=['xlsx', 'partitioned', 'sqlite', 'daemon'])
+    downtime_parser.add_argument('--from', dest='start_date', type=date.fromisoformat, 
+                                 help='First date to include (YYYY-MM-DD)')
+    downtime_parser.add_argument('--to', dest='end_date', type=date.fromisoformat, 
+                                 help='Last date to include (YYYY-MM-DD)')
+    downtime_parser.add_argument('--level', type=int, default=0, 
+                                 help='Roll reasons up to this category level (0 lists reasons)')
+    downtime_parser.add_argument('--trend', metavar='FREQ', 
+                                 help='Hours per period instead, e.g. D, W or M')
+
+    compact_parser = subparsers.add_parser('compact', help='Archive closed days to Parquet')
+    compact_parser.add_argument('--source', help='Store to read from (defaults to the backend default)')
+    compact_parser.add_argument('--backend', choices=['xlsx', 'partitioned', 'sqlite', 'daemon'])
+    compact_parser.add_argument('--archive', default='archive', help='Archive directory')
+    compact_parser.add_argument('--journal', default='crane_events.journal', 
+                                help='Event journal telling which runs are still in progress')
+
+    partitions_parser = subparsers.add_parser('archive-partitions', 
+                                              help='Zip closed workbook partitions by month')
+    partitions_parser.add_argument('--source', default='crane_operations', help='Partition directory')
+    partitions_parser.add_argument('--keep-days', type=int, default=30, 
+                                   help='Leave partitions with rows from the last N days in place')
+
+    ingest_parser = subparsers.add_parser('ingest', help='Bulk import events from CSV or JSONL')
+    ingest_parser.add_argument('events', help='CSV or JSONL file of events')
+    ingest_parser.add_argument('--format', choices=['csv', 'jsonl'], 
+                               help='Defaults to the file extension')
+    ingest_parser.add_argument('--source', help='Store to write to (defaults to the backend default)')
+    ingest_parser.add_argument('--backend', choices=['xlsx', 'partitioned', 'sqlite', 'daemon'])
+    ingest_parser.add_argument('--fleet', default='fleet.json', help='Fleet file used to validate crane numbers')
+    ingest_parser.add_argument('--archive', default='archive', 
+                               help='Archive to reopen for backfilled days')
+
+    daemon_parser = subparsers.add_parser('daemon', help='Serve a shared store to several terminals')
+    daemon_parser.add_argument('--listen', default='127.0.0.1:8765', 
+                               help="host:port or unix:/path/to.sock")
+    daemon_parser.add_argument('--source', help='Store to serve (defaults to the backend default)')
+    daemon_parser.add_argument('--backend', choices=['xlsx', 'partitioned', 'sqlite'], default='sqlite')
+
+    report_parser = subparsers.add_parser('startup-report', help='Report import and startup times')
+    report_parser.add_argument('--top', type=int, default=20, help='Number of imports to list')
+    report_parser.add_argument('--launch', action='store_true', 
+                               help='Also launch the GUI and check the startup budget')
+
+    benchmark_parser = subparsers.add_parser('benchmark', help='Benchmark the logging hot paths')
+    benchmark_parser.add_argument('--cases', nargs='+', choices=['log', 'cycles', 'shift', 'gui'], 
+                                  default=['log', 'cycles', 'shift', 'gui'])
+    benchmark_parser.add_argument('--backend', choices=['xlsx', 'sqlite'], default='xlsx')
+    benchmark_parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 100000, 1000000], 
+                                  help='Rows in the synthetic stores')
+    benchmark_parser.add_argument('--calls', type=int, default=200, help='log_* calls per size')
+    benchmark_parser.add_argument('--cycles', type=int, default=500, help='start/stop crane cycles')
+    benchmark_parser.add_argument('--rounds', type=int, default=20, help='Stop All Cranes rounds')
+    benchmark_parser.add_argument('--output', default='benchmark.json', help='JSON results file')
+    benchmark_parser.add_argument('--compare', help='Earlier results file to compare against')
+
+    return parser
+
+def main():
+    # Without arguments the operator GUI starts as before; anything else,
+    # --help and mistyped flags included, goes to argparse
+    if len(sys.argv) < 2:
+        run_gui()
+        return
+
+    args = build_parser().parse_args()
+    if args.command == 'export':
+        run_export(args)
+    elif args.command == 'downtime':
+        run_downtime(args)
+    elif args.command == 'compact':
+        run_compact(args)
+    elif args.command == 'archive-partitions':
+        run_archive_partitions(args)
+    elif args.command == 'ingest':
+        run_ingest(args)
+    elif args.command == 'daemon':
+        run_log_daemon(args)
+    elif args.command == 'startup-report':
+        run_startup_report(args)
+    elif args.command == 'benchmark':
+        run_benchmark(args)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
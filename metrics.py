@@ -0,0 +1,259 @@
+from bisect import bisect_left
+from datetime import datetime
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+
+# Upper bounds in seconds, from a fast journal append to a slow workbook save
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One extra slot for observations above the last bound (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            yield bound, running
+
+class Span:
+    __slots__ = ('metrics', 'name', 'labels', 'started')
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, self.labels)
+        return False
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Metrics:
+    # In-process latency histograms keyed by metric name and label values.
+    # Spans cost two clock reads and a short lock; with enabled False they
+    # return a shared no-op context and record nothing
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.help = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self.help[name] = help_text
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, tuple(sorted(labels.items())))
+
+    def observe(self, name, seconds, labels=()):
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        # Prometheus text exposition format
+        with self.lock:
+            snapshot = sorted(
+                (name, labels, list(histogram.cumulative()), histogram.total, histogram.count)
+                for (name, labels), histogram in self.histograms.items()
+            )
+
+        lines = []
+        described = set()
+        for name, labels, buckets, total, count in snapshot:
+            if name not in described:
+                described.add(name)
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+                lines.append(f'# TYPE {name} histogram')
+            for bound, running in buckets:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", le),))} {running}')
+            lines.append(f'{name}_sum{format_labels(labels)} {total}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, filename):
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as output:
+            output.write(self.render())
+        os.replace(temp_filename, filename)
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels)
+    return '{' + pairs + '}'
+
+class Profiler:
+    # Opt-in cProfile and tracemalloc capture. Nothing is imported or
+    # installed until start, so a profiler that is never started costs
+    # nothing. cProfile only sees the thread that calls start
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self.profile = None
+        self.tracing_memory = False
+        self.lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self, memory=True):
+        import cProfile
+        import tracemalloc
+
+        with self.lock:
+            if self.profile is not None:
+                return False
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self.tracing_memory = True
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            return True
+
+    def stop(self):
+        # Returns the files written: a .prof for pstats/snakeviz and, when
+        # memory was traced, the top allocation sites as text
+        import tracemalloc
+
+        with self.lock:
+            if self.profile is None:
+                return []
+            self.profile.disable()
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            os.makedirs(self.directory, exist_ok=True)
+            profile_filename = os.path.join(self.directory, f'cranelogger-{stamp}.prof')
+            self.profile.dump_stats(profile_filename)
+            self.profile = None
+            written = [profile_filename]
+
+            if self.tracing_memory:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                self.tracing_memory = False
+                memory_filename = os.path.join(self.directory, f'cranelogger-{stamp}-memory.txt')
+                with open(memory_filename, 'w', encoding='utf-8') as output:
+                    for stat in snapshot.statistics('lineno')[:50]:
+                        output.write(f'{stat}\n')
+                written.append(memory_filename)
+            return written
+
+    def toggle(self):
+        if self.active:
+            return self.stop()
+        self.start()
+        return []
+
+METRICS = Metrics(enabled=os.environ.get('CRANELOGGER_SPANS', '1') != '0')
+PROFILER = Profiler(os.environ.get('CRANELOGGER_PROFILE_DIR', 'profiles'))
+span = METRICS.span
+
+METRICS.describe('cranelogger_log_seconds', 'ExcelHandler.log_* calls by kind')
+METRICS.describe('cranelogger_store_seconds', 'Store operations by backend and phase')
+METRICS.describe('cranelogger_stop_crane_seconds', 'DataManager.stop_crane')
+METRICS.describe('cranelogger_dialog_to_durable_seconds',
+                 'Idle reason submitted until its rows are journaled (xlsx) or committed (sqlite)')
+METRICS.describe('cranelogger_ui_tick_seconds', 'Shared UI timer callback')
+
+def timed(name, metrics=METRICS, **labels):
+    # Decorator form of span for whole functions
+    label_key = tuple(sorted(labels.items()))
+
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            with Span(metrics, name, label_key):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def parse_listen_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def serve_metrics(address, metrics=METRICS, profiler=PROFILER, dispatch=None):
+    # GET /metrics serves the histograms; POST /profile/start and
+    # /profile/stop toggle capture. dispatch runs the toggle on the thread
+    # that should be profiled (the GUI passes a queued signal); without it
+    # the toggle runs on the server thread and the written files are returned
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            self.reply(200, metrics.render(), 'text/plain; version=0.0.4')
+
+        def do_POST(self):
+            actions = {'/profile/start': profiler.start, '/profile/stop': profiler.stop}
+            action = actions.get(self.path)
+            if action is None:
+                self.send_error(404)
+                return
+            if dispatch:
+                dispatch(action)
+                self.reply(202, 'requested\n')
+                return
+            result = action()
+            written = result if isinstance(result, list) else []
+            self.reply(200, ''.join(f'{filename}\n' for filename in written) or 'ok\n')
+
+        def reply(self, status, body, content_type='text/plain'):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(parse_listen_address(address), MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+__all__ = ['METRICS', 'PROFILER', 'span', 'timed', 'Metrics', 'Profiler', 'serve_metrics']
\ No newline at end of file
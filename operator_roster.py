@@ -0,0 +1,120 @@
+from difflib import get_close_matches
+from heapq import nsmallest
+import json
+import os
+
+# Used when no operators file is present
+DEFAULT_OPERATORS = {
+    'operators': [
+        {'name': 'John Doe'},
+        {'name': 'Jane Smith'},
+        {'name': 'Mike Johnson'},
+        {'name': 'Sarah Williams'},
+        {'name': 'Alex Brown'},
+        {'name': 'Emily Davis'}
+    ]
+}
+
+def tokens(text):
+    return text.lower().split()
+
+class OperatorRoster:
+    # Who can run a crane and who is on one right now. Assignments are
+    # held in two dicts (crane -> operator, operator -> crane) and the free
+    # operators in an insertion-ordered dict, so assign, release and the
+    # availability check are constant time whatever the roster size.
+    # Assignments belong to a shift: start_shift clears them for a new one
+    def __init__(self, config):
+        # Every prefix of every word in a name maps to the names it starts,
+        # and words are grouped by first letter for the typo fallback
+        self.operators = {}
+        self.prefixes = {}
+        self.words = {}
+        for entry in config.get('operators', []):
+            name = entry['name'] if isinstance(entry, dict) else entry
+            self.operators[name] = len(self.operators)
+            for token in tokens(name):
+                self.words.setdefault(token[0], set()).add(token)
+                for length in range(1, len(token) + 1):
+                    self.prefixes.setdefault(token[:length], set()).add(name)
+
+        self.available = dict.fromkeys(self.operators)
+        self.by_crane = {}
+        self.by_operator = {}
+        self.shift = None
+
+    @classmethod
+    def load(cls, filename='operators.json'):
+        if not os.path.exists(filename):
+            return cls(DEFAULT_OPERATORS)
+        with open(filename, encoding='utf-8') as config:
+            return cls(json.load(config))
+
+    def is_available(self, operator):
+        return operator in self.available
+
+    def operator_for(self, crane_number):
+        return self.by_crane.get(crane_number)
+
+    def crane_for(self, operator):
+        return self.by_operator.get(operator)
+
+    def assign(self, crane_number, operator):
+        # Operators not on the roster (e.g. restored from an older journal)
+        # can still hold a crane; they are just never offered as available
+        holder = self.by_operator.get(operator)
+        if holder is not None and holder != crane_number:
+            raise ValueError(f'{operator} is already assigned to crane {holder}')
+        self.release(crane_number)
+        self.by_crane[crane_number] = operator
+        self.by_operator[operator] = crane_number
+        self.available.pop(operator, None)
+
+    def release(self, crane_number):
+        operator = self.by_crane.pop(crane_number, None)
+        if operator is None:
+            return None
+        del self.by_operator[operator]
+        if operator in self.operators:
+            self.available[operator] = None
+        return operator
+
+    def start_shift(self, shift, keep=()):
+        # Frees every crane except those in keep (cranes still running into
+        # the new shift); returns the cranes that were released
+        self.shift = shift
+        released = [crane_number for crane_number in self.by_crane if crane_number not in keep]
+        for crane_number in released:
+            self.release(crane_number)
+        return released
+
+    def available_operators(self):
+        # Roster order, so the dialog does not reshuffle as people come and go
+        return sorted(self.available, key=self.operators.__getitem__)
+
+    def candidates(self, word):
+        # Names with a word starting with `word`; a word that starts none is
+        # taken as a typo and matched against similar words with the same
+        # first letter, so the cost follows the vocabulary, not the roster
+        names = self.prefixes.get(word)
+        if names:
+            return names
+        close = get_close_matches(word, self.words.get(word[0], ()), n=3, cutoff=0.7)
+        return set().union(*(self.prefixes[token] for token in close))
+
+    def search(self, text, limit=20):
+        # Available operators matching every word typed, e.g. "sa wil" or
+        # "sarha" both find Sarah Williams
+        words = tokens(text)
+        if not words:
+            return nsmallest(limit, self.available, key=self.operators.__getitem__)
+
+        matches = sorted((self.candidates(word) for word in words), key=len)
+        found = matches[0].intersection(*matches[1:])
+        return nsmallest(
+            limit,
+            (name for name in found if name in self.available),
+            key=self.operators.get
+        )
+
+__all__ = ['OperatorRoster', 'DEFAULT_OPERATORS']
\ No newline at end of file
@@ -0,0 +1,165 @@
+from datetime import date, datetime, time, timedelta
+import json
+import os
+
+MINUTES_PER_DAY = 24 * 60
+UNKNOWN_SHIFT = 'Unknown Shift'
+
+# Shift 3 runs until Shift 1 starts, so every minute of the day has a shift
+DEFAULT_CALENDAR = {
+    'patterns': {
+        'standard': [
+            {'name': 'Shift 1', 'start': '07:30', 'end': '14:00'},
+            {'name': 'Shift 2', 'start': '14:00', 'end': '22:00'},
+            {'name': 'Shift 3', 'start': '22:00', 'end': '07:30'}
+        ]
+    },
+    'default': 'standard'
+}
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+def parse_clock(value):
+    hours, minutes = value.split(':')
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= minute <= MINUTES_PER_DAY:
+        raise ValueError(f'Invalid shift time {value!r}')
+    return minute % MINUTES_PER_DAY
+
+class ShiftPattern:
+    # One day's shift layout as a minute-of-day table, so a lookup is a
+    # single index; next_change[m] is the first minute after m that
+    # belongs to another shift (or midnight), used to split runs
+    def __init__(self, name, shifts):
+        self.name = name
+        self.starts = {}
+        table = [UNKNOWN_SHIFT] * MINUTES_PER_DAY
+        for shift in shifts:
+            start, end = parse_clock(shift['start']), parse_clock(shift['end'])
+            self.starts[shift['name']] = start
+            length = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+            for offset in range(length):
+                table[(start + offset) % MINUTES_PER_DAY] = shift['name']
+        self.table = tuple(table)
+
+        next_change = [MINUTES_PER_DAY] * MINUTES_PER_DAY
+        for minute in range(MINUTES_PER_DAY - 2, -1, -1):
+            if table[minute + 1] != table[minute]:
+                next_change[minute] = minute + 1
+            else:
+                next_change[minute] = next_change[minute + 1]
+        self.next_change = tuple(next_change)
+
+    def started_previous_day(self, shift_name, minute):
+        # True for the early-morning part of a shift that began before midnight
+        start = self.starts.get(shift_name)
+        return start is not None and minute < start
+
+class ShiftSegment:
+    __slots__ = ('shift', 'day', 'start', 'end')
+
+    def __init__(self, shift, day, start, end):
+        self.shift = shift
+        self.day = day
+        self.start = start
+        self.end = end
+
+    @property
+    def seconds(self):
+        return (self.end - self.start).total_seconds()
+
+    def __repr__(self):
+        return f'ShiftSegment({self.shift!r}, {self.day}, {self.start}, {self.end})'
+
+class ShiftCalendar:
+    # Maps any moment to its shift in constant time: holidays override the
+    # weekday pattern, and each pattern is a precomputed minute table.
+    # An optional roster rotates crews over the shifts on a fixed cycle
+    def __init__(self, config):
+        self.patterns = {
+            name: ShiftPattern(name, shifts) for name, shifts in config['patterns'].items()
+        }
+        default = self.patterns[config.get('default') or next(iter(config['patterns']))]
+        weekdays = config.get('weekdays', {})
+        self.weekdays = [
+            self.patterns[weekdays[day]] if day in weekdays else default for day in WEEKDAYS
+        ]
+        self.holidays = {
+            date.fromisoformat(day): self.patterns[name]
+            for day, name in config.get('holidays', {}).items()
+        }
+
+        roster = config.get('roster')
+        self.roster_start = date.fromisoformat(roster['start']) if roster else None
+        self.roster_days = roster['days'] if roster else []
+
+    @classmethod
+    def load(cls, filename='shifts.json'):
+        if not os.path.exists(filename):
+            return cls(DEFAULT_CALENDAR)
+        with open(filename, encoding='utf-8') as config:
+            return cls(json.load(config))
+
+    def pattern_for(self, day):
+        return self.holidays.get(day) or self.weekdays[day.weekday()]
+
+    def shift_name(self, at):
+        return self.pattern_for(at.date()).table[at.hour * 60 + at.minute]
+
+    def current_shift(self):
+        return self.shift_name(datetime.now())
+
+    def shift_date(self, at):
+        # The day a shift started on; 02:00 in a 22:00-07:30 shift belongs
+        # to the previous day's shift
+        minute = at.hour * 60 + at.minute
+        pattern = self.pattern_for(at.date())
+        if pattern.started_previous_day(pattern.table[minute], minute):
+            return at.date() - timedelta(days=1)
+        return at.date()
+
+    def crew(self, at):
+        if not self.roster_days:
+            return None
+        shift = self.shift_name(at)
+        cycle_day = (self.shift_date(at) - self.roster_start).days % len(self.roster_days)
+        return self.roster_days[cycle_day].get(shift)
+
+    def split(self, start, end, by_day=False):
+        # Cut [start, end) at every shift boundary. With by_day the cuts
+        # also fall at midnight, so each segment lies in one calendar day.
+        # A zero-length event still gets the one segment it falls in
+        if start == end:
+            return [ShiftSegment(self.shift_name(start), start.date(), start, end)]
+        segments = []
+        cursor = start
+        while cursor < end:
+            day = cursor.date()
+            pattern = self.pattern_for(day)
+            minute = cursor.hour * 60 + cursor.minute
+            boundary = datetime.combine(day, time()) + timedelta(minutes=pattern.next_change[minute])
+            segment_end = min(end, boundary)
+            shift = pattern.table[minute]
+
+            previous = segments[-1] if segments else None
+            if not by_day and previous and previous.shift == shift and previous.end == cursor:
+                previous.end = segment_end
+            else:
+                segments.append(ShiftSegment(shift, day, cursor, segment_end))
+            cursor = segment_end
+        return segments
+
+def split_days(start, end):
+    # Cut [start, end) at midnight only
+    if start == end:
+        return [ShiftSegment(None, start.date(), start, end)]
+    segments = []
+    cursor = start
+    while cursor < end:
+        midnight = datetime.combine(cursor.date() + timedelta(days=1), time())
+        segment_end = min(end, midnight)
+        segments.append(ShiftSegment(None, cursor.date(), cursor, segment_end))
+        cursor = segment_end
+    return segments
+
+__all__ = ['ShiftCalendar', 'ShiftSegment', 'split_days', 'DEFAULT_CALENDAR', 'UNKNOWN_SHIFT']
\ No newline at end of file
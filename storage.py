@@ -0,0 +1,895 @@
+from contextlib import contextmanager
+from datetime import date, datetime
+from time import monotonic, sleep, time
+import io
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import zipfile
+
+from metrics import span, timed
+from shift_calendar import ShiftCalendar
+
+# Column layout for each sheet, in the order rows are appended
+SHEET_HEADERS = {
+    'Crane Data': [
+        'Date', 'Shift', 'Crane Number', 'Operator', 
+        'Start Time', 'Stop Time', 'Active Duration', 'Idle Reason', 
+        'Active Seconds', 'Idle Code'
+    ],
+    'Barge Data': [
+        'Date', 'Barge Name/ID', 'Start Time', 'Stop Time', 
+        'Tons Loaded', 'Cranes', 'Start Date'
+    ],
+    'Generator Data': [
+        'Date', 'Generator ID', 'Start Time', 'Stop Time', 
+        'Active Duration', 'Active Seconds'
+    ],
+    'Ship Data': [
+        'Date', 'Ship Name', 'Start Time', 'Finished Time', 
+        'Quantity', 'Number of Hatches', 'Cranes', 'Start Date'
+    ]
+}
+
+# openpyxl is a large share of cold start, so it is imported where first
+# used and never by the sqlite or daemon backends
+def new_workbook():
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    
+    # Create sheets
+    for sheet_name in SHEET_HEADERS:
+        if sheet_name not in workbook.sheetnames:
+            workbook.create_sheet(sheet_name)
+    
+    # Remove default sheet
+    if 'Sheet' in workbook.sheetnames:
+        workbook.remove(workbook['Sheet'])
+    
+    # Add headers to each sheet
+    for sheet_name, headers in SHEET_HEADERS.items():
+        workbook[sheet_name].append(headers)
+    
+    return workbook
+
+def save_workbook_atomically(workbook, filename):
+    # Save next to the target, fsync, then swap it in; a crash mid-save
+    # leaves the previous workbook untouched
+    temp_filename = filename + '.tmp'
+    workbook.save(temp_filename)
+    with open(temp_filename, 'rb+') as saved:
+        os.fsync(saved.fileno())
+    os.replace(temp_filename, filename)
+
+def decode_row(row):
+    # The Date column travels as an ISO string in journals and over the wire
+    if row and isinstance(row[0], str):
+        row[0] = date.fromisoformat(row[0])
+    return row
+
+class BatchingStore:
+    # Shared batch bookkeeping; subclasses implement append and flush
+    batch_depth = 0
+    flush_failed = False
+
+    def append_many(self, records):
+        with self.batch():
+            for sheet_name, row in records:
+                self.append(sheet_name, row)
+
+    def begin_batch(self):
+        self.batch_depth += 1
+
+    def end_batch(self):
+        self.batch_depth -= 1
+        if not self.batch_depth:
+            self.flush_if_due()
+
+    @contextmanager
+    def batch(self):
+        self.begin_batch()
+        try:
+            yield self
+        finally:
+            self.end_batch()
+
+    def close(self):
+        self.flush()
+
+class XlsxStore(BatchingStore):
+    def __init__(self, filename='crane_operations.xlsx', batch_size=200, flush_interval=60):
+        self.filename = filename
+        # Rows are appended to a journal next to the workbook and committed
+        # to the workbook in one save once batch_size rows are pending or
+        # the oldest pending row is flush_interval seconds old
+        self.journal_filename = os.path.splitext(filename)[0] + '.journal'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.unsynced = False
+        # After a failed save (e.g. the workbook is open in Excel) automatic
+        # flushes wait this long before trying again; the rows stay journaled
+        self.retry_at = None
+        self.create_workbook_if_not_exists()
+        self.upgrade_headers()
+        self.recover()
+
+    def create_workbook_if_not_exists(self):
+        if not os.path.exists(self.filename):
+            new_workbook().save(self.filename)
+
+    def upgrade_headers(self):
+        # Columns are only ever added at the end of a sheet; older workbooks
+        # get the new header cells once and their old rows leave them empty
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(self.filename, read_only=True)
+        try:
+            outdated = []
+            for sheet_name, headers in SHEET_HEADERS.items():
+                if sheet_name not in workbook.sheetnames:
+                    continue
+                header_row = next(workbook[sheet_name].iter_rows(max_row=1, values_only=True), ())
+                if [value for value in header_row if value is not None] != headers:
+                    outdated.append(sheet_name)
+        finally:
+            workbook.close()
+        if not outdated:
+            return
+
+        workbook = openpyxl.load_workbook(self.filename)
+        for sheet_name in outdated:
+            for column, header in enumerate(SHEET_HEADERS[sheet_name], start=1):
+                workbook[sheet_name].cell(row=1, column=column, value=header)
+        save_workbook_atomically(workbook, self.filename)
+
+    def recover(self):
+        # Journal records carry a sequence number and the workbook records
+        # the last one it holds, so a commit interrupted after the workbook
+        # was replaced but before the journal was cleared is not applied twice
+        if os.path.exists(self.filename + '.tmp'):
+            os.remove(self.filename + '.tmp')  # Save that never got swapped in
+
+        self.repair_journal()
+        committed_seq = self.read_committed_seq()
+        self.pending = []
+        self.last_seq = committed_seq
+        for seq, sheet_name, row in self.read_journal():
+            if seq is not None and seq <= committed_seq:
+                continue
+            self.pending.append((sheet_name, row))
+            self.last_seq = max(self.last_seq, seq or 0)
+        self.first_pending_at = monotonic() if self.pending else None
+
+    def repair_journal(self):
+        # Cut a torn trailing record so new appends start on a fresh line
+        if not os.path.exists(self.journal_filename):
+            return
+        with open(self.journal_filename, 'rb+') as journal:
+            data = journal.read()
+            if data and not data.endswith(b'\n'):
+                journal.truncate(data.rfind(b'\n') + 1)
+
+    def read_committed_seq(self):
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(self.filename, read_only=True)
+        try:
+            for prop in workbook.custom_doc_props.props:
+                if prop.name == 'journal_seq':
+                    return prop.value
+            return 0
+        finally:
+            workbook.close()
+
+    @timed('cranelogger_store_seconds', backend='xlsx', phase='journal')
+    def append(self, sheet_name, row):
+        # One short write per event, independent of workbook size
+        self.last_seq += 1
+        record = {'seq': self.last_seq, 'sheet': sheet_name, 'row': row}
+        with open(self.journal_filename, 'a', encoding='utf-8') as journal:
+            journal.write(json.dumps(record, default=str) + '\n')
+            journal.flush()
+            # Inside a batch one fsync at the end covers every row
+            if self.batch_depth:
+                self.unsynced = True
+            else:
+                os.fsync(journal.fileno())
+
+        self.pending.append((sheet_name, row))
+        if self.first_pending_at is None:
+            self.first_pending_at = monotonic()
+
+        # Inside a batch the thresholds are only checked once it ends
+        if not self.batch_depth:
+            self.flush_if_due()
+
+    def read_journal(self):
+        if not os.path.exists(self.journal_filename):
+            return []
+
+        records = []
+        with open(self.journal_filename, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from an interrupted append
+                records.append((record.get('seq'), record['sheet'], decode_row(record['row'])))
+        return records
+
+    @timed('cranelogger_store_seconds', backend='xlsx', phase='journal')
+    def append_many(self, records):
+        # One journal write and fsync for the whole set
+        lines = []
+        for sheet_name, row in records:
+            self.last_seq += 1
+            lines.append(json.dumps({'seq': self.last_seq, 'sheet': sheet_name, 'row': row}, default=str))
+            self.pending.append((sheet_name, row))
+        if not lines:
+            return
+        with open(self.journal_filename, 'a', encoding='utf-8') as journal:
+            journal.write('\n'.join(lines) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+        if self.first_pending_at is None:
+            self.first_pending_at = monotonic()
+        if not self.batch_depth:
+            self.flush_if_due()
+
+    def end_batch(self):
+        if self.batch_depth == 1 and self.unsynced:
+            with open(self.journal_filename, 'a', encoding='utf-8') as journal:
+                os.fsync(journal.fileno())
+            self.unsynced = False
+        super().end_batch()
+
+    def flush_if_due(self):
+        if not self.pending:
+            return False
+        if self.retry_at is not None and monotonic() < self.retry_at:
+            return False
+        if (len(self.pending) >= self.batch_size or 
+                monotonic() - self.first_pending_at >= self.flush_interval):
+            self.flush()
+            return True
+        return False
+
+    @property
+    def flush_failed(self):
+        # The last save failed and the rows are only journaled
+        return self.retry_at is not None
+
+    def flush(self):
+        # Commit every pending row, across all four sheets, in a single save
+        if self.pending:
+            try:
+                self.save_pending()
+            except Exception:
+                self.retry_at = monotonic() + self.flush_interval
+                raise
+
+        if os.path.exists(self.journal_filename):
+            os.remove(self.journal_filename)
+        self.pending = []
+        self.first_pending_at = None
+        self.retry_at = None
+
+    def save_pending(self):
+        import openpyxl
+        from openpyxl.packaging.custom import IntProperty
+
+        with span('cranelogger_store_seconds', backend='xlsx', phase='load'):
+            workbook = openpyxl.load_workbook(self.filename)
+        with span('cranelogger_store_seconds', backend='xlsx', phase='append'):
+            for sheet_name, row in self.pending:
+                workbook[sheet_name].append(row)
+        if 'journal_seq' in workbook.custom_doc_props.names:
+            workbook.custom_doc_props['journal_seq'].value = self.last_seq
+        else:
+            workbook.custom_doc_props.append(IntProperty(name='journal_seq', value=self.last_seq))
+        with span('cranelogger_store_seconds', backend='xlsx', phase='save'):
+            save_workbook_atomically(workbook, self.filename)
+
+    def iter_rows(self, sheet_name, start_date=None, end_date=None):
+        yield from iter_workbook_rows(self.filename, sheet_name, start_date, end_date)
+
+        for pending_sheet, row in list(self.pending):
+            if pending_sheet == sheet_name and in_date_range(row[0], start_date, end_date):
+                yield list(row)
+
+def iter_workbook_rows(source, sheet_name, start_date=None, end_date=None):
+    # Streams rows in read-only mode, so memory does not grow with history;
+    # source is a filename or a file object
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(min_row=2, values_only=True)
+        for row in rows:
+            row = list(row)
+            if hasattr(row[0], 'date'):
+                row[0] = row[0].date()
+            if in_date_range(row[0], start_date, end_date):
+                yield row
+    finally:
+        workbook.close()
+
+# Column that places a row within its day, per sheet, for shift rotation
+ROW_TIME_HEADERS = {
+    'Crane Data': 'Start Time',
+    'Barge Data': 'Stop Time',
+    'Generator Data': 'Start Time',
+    'Ship Data': 'Finished Time'
+}
+
+@contextmanager
+def file_lock(filename, timeout=30, stale_after=300):
+    # Portable exclusive lock: whoever creates the file holds it. A file
+    # left by a holder that crashed is taken over once it is stale
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            lock = os.open(filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time() - os.path.getmtime(filename) > stale_after:
+                    os.remove(filename)
+                    continue
+            except FileNotFoundError:
+                continue
+            if monotonic() > deadline:
+                raise TimeoutError(f'Could not lock {filename}') from None
+            sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(lock)
+        os.remove(filename)
+
+class PartitionedXlsxStore(BatchingStore):
+    # One workbook per day or per shift, each with the four sheets, so a
+    # save only rewrites the current partition. Every partition is an
+    # XlsxStore with its own journal. manifest.json records, per partition
+    # and sheet, the first and last row date it holds; readers open only
+    # the partitions whose range overlaps the query. Rows go to the
+    # partition of the day (or shift) they are dated by. The manifest is
+    # shared with archive-partitions runs in other processes, so every
+    # change re-reads it under a lock file
+    def __init__(self, filename='crane_operations', rotation=None, batch_size=200, flush_interval=60, 
+                 recover=True):
+        self.filename = filename
+        self.rotation = rotation or os.environ.get('CRANELOGGER_ROTATION', 'day')
+        if self.rotation not in ('day', 'shift'):
+            raise ValueError(f"Unknown rotation '{self.rotation}'")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shift_calendar = ShiftCalendar.load() if self.rotation == 'shift' else None
+        self.manifest_filename = os.path.join(filename, 'manifest.json')
+        self.active = None
+        self.active_name = None
+        os.makedirs(filename, exist_ok=True)
+        self.manifest = self.read_manifest()
+        # Only the writing process recovers; a second process (e.g.
+        # archive-partitions) must leave the writer's journals alone
+        if recover:
+            self.recover()
+
+    def read_manifest(self):
+        if not os.path.exists(self.manifest_filename):
+            return {'rotation': self.rotation, 'partitions': {}}
+        with open(self.manifest_filename, encoding='utf-8') as manifest:
+            return json.load(manifest)
+
+    def write_manifest(self):
+        temp_filename = self.manifest_filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as manifest:
+            json.dump(self.manifest, manifest, indent=2, sort_keys=True)
+            manifest.flush()
+            os.fsync(manifest.fileno())
+        os.replace(temp_filename, self.manifest_filename)
+
+    @contextmanager
+    def manifest_update(self):
+        # Yields the partitions of a fresh copy of the manifest, written
+        # back when the block ends
+        with file_lock(self.manifest_filename + '.lock'):
+            self.manifest = self.read_manifest()
+            yield self.manifest['partitions']
+            self.write_manifest()
+
+    def recover(self):
+        # Commit rows a crash left in partition journals, then treat every
+        # partition from an earlier run as closed
+        for entry in sorted(os.listdir(self.filename)):
+            if not entry.endswith('.journal'):
+                continue
+            name = os.path.splitext(entry)[0] + '.xlsx'
+            store = XlsxStore(os.path.join(self.filename, name), self.batch_size, self.flush_interval)
+            self.widen(name, store.pending)
+            store.close()
+        with self.manifest_update() as partitions:
+            for name, info in partitions.items():
+                if info['status'] in ('open', 'archiving'):
+                    info['status'] = 'closed'
+                elif info['status'] == 'archived' and os.path.exists(os.path.join(self.filename, name)):
+                    os.remove(os.path.join(self.filename, name))  # Archived before a crash
+
+    def partition_name(self, now):
+        if self.rotation == 'shift':
+            # A night shift stays in the file of the day it started on
+            shift = self.shift_calendar.shift_name(now)
+            day = self.shift_calendar.shift_date(now)
+            return f"{day.isoformat()}_{re.sub(r'[^a-z0-9]+', '-', shift.lower()).strip('-')}.xlsx"
+        return f'{now.date().isoformat()}.xlsx'
+
+    def row_partition(self, sheet_name, row):
+        # The partition a row belongs to by its own date (and time of day,
+        # for shift rotation), not by when it is written
+        row_date = row[0] if isinstance(row[0], date) else date.fromisoformat(str(row[0])[:10])
+        at = datetime.combine(row_date, datetime.min.time())
+        if self.rotation == 'shift':
+            index = SHEET_HEADERS[sheet_name].index(ROW_TIME_HEADERS[sheet_name])
+            value = row[index] if index < len(row) else None
+            if value:
+                at = datetime.combine(row_date, datetime.strptime(str(value), '%H:%M:%S').time())
+        return self.partition_name(at)
+
+    def rotate(self):
+        # Commit and close the current partition; the next write opens a new one
+        if self.active is None:
+            return
+        self.active.close()
+        with self.manifest_update() as partitions:
+            partitions[self.active_name]['status'] = 'closed'
+        self.active = None
+        self.active_name = None
+
+    def active_store(self):
+        name = self.partition_name(datetime.now())
+        if name != self.active_name:
+            self.rotate()
+            self.active = XlsxStore(os.path.join(self.filename, name), self.batch_size, self.flush_interval)
+            # A batch that spans the rotation carries on in the new partition
+            for _ in range(self.batch_depth):
+                self.active.begin_batch()
+            self.active_name = name
+            with self.manifest_update() as partitions:
+                partitions.setdefault(name, {'sheets': {}})['status'] = 'open'
+        return self.active
+
+    def grow(self, partitions, name, records):
+        info = partitions.setdefault(name, {'status': 'closed', 'sheets': {}})
+        changed = False
+        for sheet_name, row in records:
+            day = row[0].isoformat() if isinstance(row[0], date) else str(row[0])
+            dates = info['sheets'].get(sheet_name)
+            if dates is None:
+                info['sheets'][sheet_name] = [day, day]
+            elif day < dates[0]:
+                dates[0] = day
+            elif day > dates[1]:
+                dates[1] = day
+            else:
+                continue
+            changed = True
+        return changed
+
+    def widen(self, name, records):
+        # Ranges only ever grow, and the manifest is written before the
+        # rows reach the partition, so it never misses a row after a crash.
+        # The lock is only taken when a range actually grows
+        if self.grow(self.manifest['partitions'], name, records):
+            with self.manifest_update() as partitions:
+                self.grow(partitions, name, records)
+
+    def append(self, sheet_name, row):
+        self.append_many([(sheet_name, row)])
+
+    def append_many(self, records):
+        store = None
+        by_partition = {}
+        for sheet_name, row in records:
+            by_partition.setdefault(self.row_partition(sheet_name, row), []).append((sheet_name, row))
+        for name, group in by_partition.items():
+            store = store or self.active_store()
+            if name == self.active_name or not self.append_closed(name, group):
+                self.widen(self.active_name, group)
+                store.append_many(group)
+
+    def append_closed(self, name, records):
+        # Rows for an earlier day or shift (a backfill, or the part of a
+        # run before midnight) are committed straight to its partition,
+        # which is marked open meanwhile so it is not archived under them.
+        # An archived partition cannot take rows any more: returns False,
+        # and they go to the current partition, whose range covers them
+        with self.manifest_update() as partitions:
+            info = partitions.get(name)
+            if info is not None and info['status'] != 'closed':
+                return False
+            partitions.setdefault(name, {'sheets': {}})['status'] = 'open'
+        self.widen(name, records)
+        store = XlsxStore(os.path.join(self.filename, name), self.batch_size, self.flush_interval)
+        try:
+            store.append_many(records)
+        finally:
+            store.close()
+            with self.manifest_update() as partitions:
+                partitions[name]['status'] = 'closed'
+        return True
+
+    def begin_batch(self):
+        super().begin_batch()
+        if self.active is not None:
+            self.active.begin_batch()
+
+    def end_batch(self):
+        self.batch_depth -= 1
+        if self.active is not None:
+            self.active.end_batch()
+
+    def flush_if_due(self):
+        if self.active is None:
+            return False
+        if not self.batch_depth and self.partition_name(datetime.now()) != self.active_name:
+            self.rotate()
+            return True
+        return self.active.flush_if_due()
+
+    @property
+    def flush_failed(self):
+        return self.active is not None and self.active.flush_failed
+
+    def flush(self):
+        if self.active is not None:
+            self.active.flush()
+
+    def close(self):
+        if self.active is not None:
+            self.active.close()
+
+    def partitions_for(self, manifest, sheet_name, start_date=None, end_date=None):
+        start = start_date.isoformat() if start_date else None
+        end = end_date.isoformat() if end_date else None
+        for name, info in sorted(manifest['partitions'].items()):
+            dates = info['sheets'].get(sheet_name)
+            if dates is None:
+                continue
+            if (start is not None and dates[1] < start) or (end is not None and dates[0] > end):
+                continue
+            yield name, info
+
+    def iter_archived(self, name, info, sheet_name, start_date=None, end_date=None):
+        with zipfile.ZipFile(os.path.join(self.filename, info['archive'])) as bundle:
+            data = bundle.read(name)
+        yield from iter_workbook_rows(io.BytesIO(data), sheet_name, start_date, end_date)
+
+    def iter_rows(self, sheet_name, start_date=None, end_date=None):
+        # Read from the manifest on disk: another process may have archived
+        # partitions since this one last changed it
+        manifest = self.read_manifest()
+        for name, info in list(self.partitions_for(manifest, sheet_name, start_date, end_date)):
+            if name == self.active_name:
+                yield from self.active.iter_rows(sheet_name, start_date, end_date)
+            elif info['status'] == 'archived':
+                yield from self.iter_archived(name, info, sheet_name, start_date, end_date)
+            else:
+                try:
+                    rows = iter_workbook_rows(os.path.join(self.filename, name), sheet_name, start_date, end_date)
+                    first = next(rows, None)
+                except FileNotFoundError:
+                    # Archived between reading the manifest and opening it
+                    info = self.read_manifest()['partitions'][name]
+                    yield from self.iter_archived(name, info, sheet_name, start_date, end_date)
+                    continue
+                if first is not None:
+                    yield first
+                    yield from rows
+
+    def archive_partitions(self, before):
+        # Closed partitions whose rows all predate `before` move into one
+        # zip per month under archive/. They are marked 'archiving' first so
+        # no writer reopens them; each zip is rebuilt beside the old one and
+        # swapped in, and a partition file is only removed after the
+        # manifest points at its archive
+        archive_directory = os.path.join(self.filename, 'archive')
+        # The partition for the current day or shift is still written to
+        current = self.partition_name(datetime.now())
+        by_month = {}
+        with self.manifest_update() as partitions:
+            for name, info in partitions.items():
+                if info['status'] != 'closed' or not info['sheets'] or name == current:
+                    continue
+                if max(dates[1] for dates in info['sheets'].values()) >= before.isoformat():
+                    continue
+                info['status'] = 'archiving'
+                by_month.setdefault(name[:7], []).append(name)
+
+        archived = []
+        for month, names in sorted(by_month.items()):
+            os.makedirs(archive_directory, exist_ok=True)
+            archive_name = os.path.join('archive', f'{month}.zip')
+            archive_filename = os.path.join(self.filename, archive_name)
+            temp_filename = archive_filename + '.tmp'
+            with zipfile.ZipFile(temp_filename, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                if os.path.exists(archive_filename):
+                    with zipfile.ZipFile(archive_filename) as previous:
+                        for item in previous.infolist():
+                            if item.filename not in names:
+                                bundle.writestr(item, previous.read(item.filename))
+                for name in sorted(names):
+                    bundle.write(os.path.join(self.filename, name), name)
+            with open(temp_filename, 'rb') as written:
+                os.fsync(written.fileno())
+            os.replace(temp_filename, archive_filename)
+
+            with self.manifest_update() as partitions:
+                for name in names:
+                    partitions[name].update(status='archived', archive=archive_name)
+            for name in names:
+                os.remove(os.path.join(self.filename, name))
+            archived.extend(sorted(names))
+        return archived
+
+def in_date_range(row_date, start_date=None, end_date=None):
+    if start_date is not None and (row_date is None or row_date < start_date):
+        return False
+    if end_date is not None and (row_date is None or row_date > end_date):
+        return False
+    return True
+
+def table_name(sheet_name):
+    return column_name(sheet_name)
+
+def column_name(header):
+    # 'Barge Name/ID' -> 'barge_name_id'
+    return re.sub(r'[^a-z0-9]+', '_', header.lower()).strip('_')
+
+# Secondary indexes per sheet, besides the date index every table gets
+SQLITE_INDEXES = {
+    'Crane Data': ['Shift', 'Crane Number', 'Operator', 'Idle Code'],
+    'Barge Data': ['Barge Name/ID'],
+    'Generator Data': ['Generator ID'],
+    'Ship Data': ['Ship Name']
+}
+
+class SqliteStore(BatchingStore):
+    def __init__(self, filename='crane_operations.db'):
+        self.filename = filename
+        # The connection is shared with the writer thread; calls are serialised
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.create_tables()
+
+    def create_tables(self):
+        with self.lock, self.connection:
+            for sheet_name, headers in SHEET_HEADERS.items():
+                table = table_name(sheet_name)
+                columns = ', '.join(column_name(header) for header in headers)
+                self.connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} '
+                    f'(id INTEGER PRIMARY KEY, {columns})'
+                )
+                # Tables created before a column was added get it appended
+                existing = {info[1] for info in self.connection.execute(f'PRAGMA table_info({table})')}
+                for header in headers:
+                    if column_name(header) not in existing:
+                        self.connection.execute(f'ALTER TABLE {table} ADD COLUMN {column_name(header)}')
+                for header in ['Date'] + SQLITE_INDEXES[sheet_name]:
+                    column = column_name(header)
+                    self.connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} '
+                        f'ON {table} ({column})'
+                    )
+
+    @timed('cranelogger_store_seconds', backend='sqlite', phase='insert')
+    def append(self, sheet_name, row):
+        headers = SHEET_HEADERS[sheet_name]
+        columns = ', '.join(column_name(header) for header in headers)
+        placeholders = ', '.join('?' for _ in headers)
+        row = list(row)
+        if isinstance(row[0], date):
+            row[0] = row[0].isoformat()
+
+        with self.lock:
+            self.connection.execute(
+                f'INSERT INTO {table_name(sheet_name)} ({columns}) VALUES ({placeholders})',
+                row
+            )
+            # Inside a batch the transaction stays open until it ends
+            if not self.batch_depth:
+                self.connection.commit()
+
+    @timed('cranelogger_store_seconds', backend='sqlite', phase='insert')
+    def append_many(self, records):
+        by_sheet = {}
+        for sheet_name, row in records:
+            row = list(row)
+            if isinstance(row[0], date):
+                row[0] = row[0].isoformat()
+            by_sheet.setdefault(sheet_name, []).append(row)
+
+        with self.lock:
+            for sheet_name, rows in by_sheet.items():
+                headers = SHEET_HEADERS[sheet_name]
+                columns = ', '.join(column_name(header) for header in headers)
+                placeholders = ', '.join('?' for _ in headers)
+                self.connection.executemany(
+                    f'INSERT INTO {table_name(sheet_name)} ({columns}) VALUES ({placeholders})',
+                    rows
+                )
+            if not self.batch_depth:
+                self.connection.commit()
+
+    def flush_if_due(self):
+        self.flush()
+        return True
+
+    def flush(self):
+        with self.lock:
+            # The idle writer calls this every second; only real commits are timed
+            if self.connection.in_transaction:
+                with span('cranelogger_store_seconds', backend='sqlite', phase='commit'):
+                    self.connection.commit()
+
+    def iter_rows(self, sheet_name, start_date=None, end_date=None):
+        headers = SHEET_HEADERS[sheet_name]
+        columns = ', '.join(column_name(header) for header in headers)
+        query = f'SELECT {columns} FROM {table_name(sheet_name)}'
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append('date >= ?')
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            conditions.append('date <= ?')
+            params.append(end_date.isoformat())
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY id'
+
+        # A separate reader connection streams the cursor without holding
+        # the writer lock; WAL lets it run alongside ongoing inserts
+        reader = sqlite3.connect(self.filename)
+        try:
+            for row in reader.execute(query, params):
+                row = list(row)
+                if row[0]:
+                    row[0] = date.fromisoformat(row[0])
+                yield row
+        finally:
+            reader.close()
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+
+def parse_address(address):
+    # 'unix:/path/to.sock' or 'host:port'
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+class RemoteStore(BatchingStore):
+    # Client for log_daemon: rows are sent as JSON lines and acknowledged
+    # once the daemon has written them; batches go over in chunks of
+    # chunk_rows rows
+    def __init__(self, filename='127.0.0.1:8765', timeout=30, chunk_rows=500):
+        self.filename = filename
+        self.timeout = timeout
+        self.chunk_rows = chunk_rows
+        self.lock = threading.Lock()
+        self.buffered = []
+        self.connection = None
+
+    def connect(self):
+        family, address = parse_address(self.filename)
+        connection = socket.socket(family, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        connection.connect(address)
+        return connection, connection.makefile('rwb')
+
+    def request(self, payload):
+        line = (json.dumps(payload, default=str) + '\n').encode('utf-8')
+        with self.lock:
+            if self.connection is None:
+                self.connection = self.connect()
+            connection, stream = self.connection
+            try:
+                stream.write(line)
+                stream.flush()
+                response = stream.readline()
+            except OSError:
+                self.connection = None
+                connection.close()
+                raise
+            if not response:
+                self.connection = None
+                connection.close()
+                raise ConnectionError('Logging daemon closed the connection')
+        response = json.loads(response)
+        if not response['ok']:
+            raise IOError(response['error'])
+        return response
+
+    def append(self, sheet_name, row):
+        if self.batch_depth:
+            self.buffered.append({'sheet': sheet_name, 'row': row})
+            return
+        self.request({'op': 'append', 'rows': [{'sheet': sheet_name, 'row': row}]})
+
+    def append_many(self, records):
+        rows = [{'sheet': sheet_name, 'row': row} for sheet_name, row in records]
+        if self.batch_depth:
+            self.buffered.extend(rows)
+        else:
+            self.send(rows)
+
+    def send(self, rows):
+        # One request per chunk keeps every line well under the daemon's limit
+        for start in range(0, len(rows), self.chunk_rows):
+            self.request({'op': 'append', 'rows': rows[start:start + self.chunk_rows]})
+
+    def flush_if_due(self):
+        # The daemon owns the flush thresholds; this only sends a finished batch
+        if self.buffered and not self.batch_depth:
+            rows, self.buffered = self.buffered, []
+            self.send(rows)
+            return True
+        return False
+
+    def flush(self):
+        self.flush_if_due()
+        self.request({'op': 'flush'})
+
+    def iter_rows(self, sheet_name, start_date=None, end_date=None):
+        # Reads use their own connection so they never hold up writes
+        connection, stream = self.connect()
+        try:
+            request = {'op': 'rows', 'sheet': sheet_name, 'start_date': start_date, 'end_date': end_date}
+            stream.write((json.dumps(request, default=str) + '\n').encode('utf-8'))
+            stream.flush()
+            for line in stream:
+                response = json.loads(line)
+                if not response['ok']:
+                    raise IOError(response['error'])
+                if 'row' not in response:
+                    return
+                yield decode_row(response['row'])
+        finally:
+            connection.close()
+
+    def close(self):
+        self.flush_if_due()
+        with self.lock:
+            if self.connection is not None:
+                self.connection[0].close()
+                self.connection = None
+
+STORE_BACKENDS = {
+    'xlsx': XlsxStore,
+    'partitioned': PartitionedXlsxStore,
+    'sqlite': SqliteStore,
+    'daemon': RemoteStore
+}
+
+def open_store(backend='xlsx', filename=None, **options):
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}'")
+    if filename is not None:
+        options['filename'] = filename
+    return STORE_BACKENDS[backend](**options)
+
+__all__ = [
+    'SHEET_HEADERS', 'STORE_BACKENDS', 'XlsxStore', 'PartitionedXlsxStore', 'SqliteStore',
+    'RemoteStore', 'new_workbook', 'open_store', 'decode_row', 'parse_address'
+]
\ No newline at end of file
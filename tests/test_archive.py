@@ -0,0 +1,91 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from archive import ShiftArchive
+from excel_handler import ExcelHandler
+from ingest import ingest_events
+
+@pytest.fixture
+def excel_handler(tmp_path, monkeypatch):
+    # Default fleet, shifts and idle reasons, whatever is in the checkout
+    monkeypatch.chdir(tmp_path)
+    handler = ExcelHandler(str(tmp_path / 'crane_operations.db'), backend='sqlite')
+    yield handler
+    handler.close()
+
+def active_hours(frame):
+    return frame['active'].sum().total_seconds() / 3600
+
+def test_open_run_keeps_its_days_out_of_the_archive(excel_handler, tmp_path):
+    archive = ShiftArchive(str(tmp_path / 'archive'))
+    excel_handler.log_crane_data(1, 'John Doe', datetime(2024, 3, 1, 8), datetime(2024, 3, 1, 10), None)
+    excel_handler.flush()
+
+    # Crane 2 started at 22:00 on the 2nd and is still running on the 4th
+    archive.compact(excel_handler, today=date(2024, 3, 4), open_since=date(2024, 3, 2))
+    assert archive.archived_through('Crane Data') == date(2024, 3, 1)
+
+    # It stops after midnight; part of the run is dated the 2nd
+    excel_handler.log_crane_data(
+        2, 'Jane Smith', datetime(2024, 3, 2, 22), datetime(2024, 3, 3, 1), 'Maintenance'
+    )
+    excel_handler.flush()
+    archive.compact(excel_handler, today=date(2024, 3, 4))
+
+    frame = archive.load_crane_frame(excel_handler)
+    assert active_hours(frame) == pytest.approx(5)
+    assert active_hours(frame[frame['date'] == '2024-03-02']) == pytest.approx(2)
+
+def test_backfill_reopens_archived_days(excel_handler, tmp_path):
+    archive = ShiftArchive(str(tmp_path / 'archive'))
+    excel_handler.log_crane_data(1, 'John Doe', datetime(2024, 2, 27, 8), datetime(2024, 2, 27, 9), None)
+    excel_handler.log_crane_data(1, 'John Doe', datetime(2024, 3, 1, 8), datetime(2024, 3, 1, 10), None)
+    excel_handler.flush()
+    archive.compact(excel_handler, today=date(2024, 3, 4))
+
+    events = [(1, {
+        'type': 'crane', 'crane_number': 2, 'operator': 'Jane Smith',
+        'start_time': '2024-03-02T08:00:00', 'stop_time': '2024-03-02T12:00:00'
+    })]
+    result = ingest_events(excel_handler, events)
+    assert archive.reopen('Crane Data', result.first_dates['Crane Data'])
+    # Earlier months stay archived
+    assert archive.archived_through('Crane Data') == date(2024, 2, 29)
+
+    archive.compact(excel_handler, today=date(2024, 3, 4))
+    frame = archive.load_crane_frame(excel_handler)
+    assert active_hours(frame) == pytest.approx(7)
+    assert archive.archived_through('Crane Data') == date(2024, 3, 3)
+    assert not archive.reopen('Crane Data', date(2024, 3, 4) + timedelta(days=1))
+
+def test_columns_empty_on_the_first_day_keep_later_values(excel_handler, tmp_path):
+    archive = ShiftArchive(str(tmp_path / 'archive'))
+    excel_handler.log_crane_data(1, 'John Doe', datetime(2024, 3, 1, 8), datetime(2024, 3, 1, 9), None)
+    excel_handler.append_row('Barge Data', excel_handler.barge_row(
+        'B1', datetime(2024, 3, 1, 8), datetime(2024, 3, 1, 9), 10.0, date(2024, 3, 1)
+    ))
+    excel_handler.flush()
+    archive.compact(excel_handler, today=date(2024, 3, 2))
+
+    excel_handler.log_crane_data(
+        1, 'John Doe', datetime(2024, 3, 2, 8), datetime(2024, 3, 2, 9), 'Maintenance'
+    )
+    excel_handler.append_row('Barge Data', excel_handler.barge_row(
+        'B2', datetime(2024, 3, 2, 8), datetime(2024, 3, 2, 9), 20.0, date(2024, 3, 2), '1, 2'
+    ))
+    excel_handler.flush()
+    archive.compact(excel_handler, today=date(2024, 3, 3))
+
+    cranes = archive.load_crane_frame(excel_handler, end_date=date(2024, 3, 2))
+    assert cranes['idle_reason'].isna().tolist() == [True, False]
+    assert cranes['idle_reason'].tolist()[1] == 'Maintenance'
+    barges = archive.load_sheet(excel_handler, 'Barge Data', end_date=date(2024, 3, 2))
+    assert barges['cranes'].isna().tolist() == [True, False]
+    assert barges['cranes'].tolist()[1] == '1, 2'
+
+def test_archived_sheet_without_rows_loads_empty(excel_handler, tmp_path):
+    archive = ShiftArchive(str(tmp_path / 'archive'))
+    archive.compact(excel_handler, today=date(2024, 3, 4))
+    frame = archive.load_sheet(excel_handler, 'Ship Data', date(2024, 3, 1), date(2024, 3, 2))
+    assert frame.empty
@@ -0,0 +1,118 @@
+from datetime import date, datetime
+
+import pytest
+
+from shift_calendar import DEFAULT_CALENDAR, ShiftCalendar
+
+# Saturdays and one Wednesday holiday run two twelve-hour shifts
+SWITCHING_CALENDAR = {
+    'patterns': {
+        'standard': DEFAULT_CALENDAR['patterns']['standard'],
+        'weekend': [
+            {'name': 'Day', 'start': '06:00', 'end': '18:00'},
+            {'name': 'Night', 'start': '18:00', 'end': '06:00'}
+        ]
+    },
+    'default': 'standard',
+    'weekdays': {'saturday': 'weekend'},
+    'holidays': {'2024-03-06': 'weekend'}
+}
+
+@pytest.fixture
+def calendar():
+    return ShiftCalendar(DEFAULT_CALENDAR)
+
+def at(day, clock):
+    hours, minutes = clock.split(':')
+    return datetime(2024, 3, day, int(hours), int(minutes))
+
+def segments(calendar, start, end, by_day):
+    return [
+        (segment.shift, segment.day.day, f'{segment.start:%H:%M}', f'{segment.end:%H:%M}')
+        for segment in calendar.split(start, end, by_day=by_day)
+    ]
+
+@pytest.mark.parametrize('clock, shift', [
+    ('00:00', 'Shift 3'),
+    ('07:29', 'Shift 3'),
+    ('07:30', 'Shift 1'),
+    ('13:59', 'Shift 1'),
+    ('14:00', 'Shift 2'),
+    ('21:59', 'Shift 2'),
+    ('22:00', 'Shift 3'),
+    ('23:59', 'Shift 3'),
+])
+def test_shift_boundaries(calendar, clock, shift):
+    assert calendar.shift_name(at(1, clock)) == shift
+
+@pytest.mark.parametrize('start, end, by_day, expected', [
+    # A run inside one shift stays whole
+    (at(1, '08:00'), at(1, '09:00'), False, [('Shift 1', 1, '08:00', '09:00')]),
+    (at(1, '13:00'), at(1, '15:00'), False, [
+        ('Shift 1', 1, '13:00', '14:00'), ('Shift 2', 1, '14:00', '15:00')
+    ]),
+    # Shift 3 runs past midnight; only by_day cuts it there
+    (at(1, '21:00'), at(2, '01:00'), False, [
+        ('Shift 2', 1, '21:00', '22:00'), ('Shift 3', 1, '22:00', '01:00')
+    ]),
+    (at(1, '21:00'), at(2, '01:00'), True, [
+        ('Shift 2', 1, '21:00', '22:00'), ('Shift 3', 1, '22:00', '00:00'), ('Shift 3', 2, '00:00', '01:00')
+    ]),
+    (at(1, '23:00'), at(2, '08:00'), False, [
+        ('Shift 3', 1, '23:00', '07:30'), ('Shift 1', 2, '07:30', '08:00')
+    ]),
+    (at(1, '23:00'), at(2, '08:00'), True, [
+        ('Shift 3', 1, '23:00', '00:00'), ('Shift 3', 2, '00:00', '07:30'), ('Shift 1', 2, '07:30', '08:00')
+    ]),
+])
+def test_split(calendar, start, end, by_day, expected):
+    assert segments(calendar, start, end, by_day) == expected
+
+@pytest.mark.parametrize('moment, shift', [
+    (at(1, '10:00'), 'Shift 1'),
+    (at(1, '13:59'), 'Shift 1'),
+    (at(1, '14:00'), 'Shift 2'),
+    (at(1, '22:00'), 'Shift 3'),
+    (at(2, '00:00'), 'Shift 3'),
+])
+@pytest.mark.parametrize('by_day', [False, True])
+def test_zero_length_run_gets_one_empty_segment(calendar, moment, shift, by_day):
+    [segment] = calendar.split(moment, moment, by_day=by_day)
+    assert (segment.shift, segment.day, segment.seconds) == (shift, moment.date(), 0)
+
+@pytest.mark.parametrize('moment, shift', [
+    (at(5, '10:00'), 'Shift 1'),  # Tuesday
+    (at(6, '10:00'), 'Day'),      # Wednesday holiday
+    (at(6, '19:00'), 'Night'),
+    (at(7, '05:00'), 'Shift 3'),  # Thursday, back to the standard pattern
+    (at(9, '07:00'), 'Day'),      # Saturday
+    (at(9, '18:00'), 'Night'),
+    (at(10, '07:00'), 'Shift 3'), # Sunday
+])
+def test_holidays_and_weekdays_pick_the_pattern(moment, shift):
+    assert ShiftCalendar(SWITCHING_CALENDAR).shift_name(moment) == shift
+
+@pytest.mark.parametrize('by_day, expected', [
+    (False, [
+        ('Shift 2', 8, '21:00', '22:00'), ('Shift 3', 8, '22:00', '00:00'),
+        ('Night', 9, '00:00', '06:00'), ('Day', 9, '06:00', '07:00')
+    ]),
+    (True, [
+        ('Shift 2', 8, '21:00', '22:00'), ('Shift 3', 8, '22:00', '00:00'),
+        ('Night', 9, '00:00', '06:00'), ('Day', 9, '06:00', '07:00')
+    ]),
+])
+def test_split_follows_the_pattern_switch_at_midnight(by_day, expected):
+    # Friday night into Saturday
+    calendar = ShiftCalendar(SWITCHING_CALENDAR)
+    assert segments(calendar, at(8, '21:00'), at(9, '07:00'), by_day) == expected
+
+@pytest.mark.parametrize('moment, shift_date', [
+    (at(2, '02:00'), date(2024, 3, 1)),
+    (at(2, '07:29'), date(2024, 3, 1)),
+    (at(2, '07:30'), date(2024, 3, 2)),
+    (at(2, '22:00'), date(2024, 3, 2)),
+    (at(2, '23:59'), date(2024, 3, 2)),
+])
+def test_shift_date(calendar, moment, shift_date):
+    assert calendar.shift_date(moment) == shift_date